@@ -1,178 +1,108 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import numpy as np
-import re
-import sqlite3
-import bcrypt
 import datetime
-from sqlalchemy import create_engine, text
+import functools
+import os
+import threading
+
+from auth import LoginThrottled, create_user, login_user
+from db import create_tables
+from household import Household
+from instrumentation import (
+    current_rerun, finish_rerun, prometheus_text, record_cache, start_rerun, timed,
+)
+from log_io import export_logs_bytes
+from menu_cache import load_compiled_menu, source_mtime
+from planner import MenuPlanner, dish_name
+from reminder_scheduler import DEFAULT_RESYNC_S, FileNotifier, ReminderScheduler
+from session_context import UserContext
 
 # --------------------------------------------------------------------------------
 # Налаштування сторінки Streamlit
 st.set_page_config(page_title='Меню харчування', layout='wide')
 
+# Статистика цього rerun (спани, SQL-запити, кеші) — див. instrumentation.py
+start_rerun()
+
 # --------------------------------------------------------------------------------
 # Підключення або створення бази даних SQLite
-# Створимо engine через SQLAlchemy для зручності
-engine = create_engine('sqlite:///food_app.db', echo=False)
+# Engine (пул, WAL, busy_timeout) та функції для роботи з базою — у db.py
+# Створимо таблиці й застосуємо міграції один раз на процес, а не на кожен rerun
+@st.cache_resource
+def init_database():
+    create_tables()
+
+init_database()
+
+# Планувальник нагадувань: один фоновий потік на процес. Якщо застосунок
+# масштабується на кілька реплік, краще вимкнути його тут
+# (FOOD_APP_REMINDER_SCHEDULER=off) і запустити окремий демон:
+# python reminder_scheduler.py --sink reminders.log
+# Спрацювання пишуться у файл FOOD_APP_REMINDER_SINK (JSON-рядки): логер
+# 'reminders' під Streamlit ніхто не налаштовує, тож LogNotifier тут
+# нічого не показав би.
+@st.cache_resource
+def start_reminder_scheduler():
+    notifier = FileNotifier(os.environ.get('FOOD_APP_REMINDER_SINK', 'reminders.log'))
+    return ReminderScheduler(notifier, resync_interval=DEFAULT_RESYNC_S).start()
+
+if os.environ.get('FOOD_APP_REMINDER_SCHEDULER', 'app') == 'app':
+    start_reminder_scheduler()
 
 # --------------------------------------------------------------------------------
-# Функції для роботи з базою даних (користувачі, журнали, тощо)
-def create_tables():
-    """Створення таблиць, якщо їх ще немає."""
-    with engine.connect() as conn:
-        # Таблиця користувачів
-        conn.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash BLOB NOT NULL
-        );
-        """)
-        # Таблиця журналу ваги та активності
-        conn.execute("""
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            date DATE NOT NULL,
-            weight REAL NOT NULL,
-            activity INTEGER NOT NULL,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        );
-        """)
-        # Таблиця для push-нагадувань (демо)
-        conn.execute("""
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            reminder_time TEXT NOT NULL,
-            message TEXT,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        );
-        """)
-
-create_tables()  # Створимо таблиці при запуску
-
-def get_user_id(username):
-    """Повертає id користувача за username."""
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT id FROM users WHERE username = :u"),
-            {"u": username}
-        ).fetchone()
-    return result[0] if result else None
-
-def create_user(username, password):
-    """Створюємо нового користувача, якщо такого немає. Повертає True/False."""
-    if not username or not password:
-        return False
-    with engine.connect() as conn:
-        # Перевірити, чи користувач уже існує
-        existing = conn.execute(
-            text("SELECT username FROM users WHERE username=:u"), 
-            {"u": username}
-        ).fetchone()
-        if existing:
-            return False
-        
-        # Хешуємо пароль
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        
-        # Додаємо користувача
-        conn.execute(
-            text("INSERT INTO users (username, password_hash) VALUES (:u, :p)"),
-            {"u": username, "p": password_hash}
-        )
-    return True
-
-def login_user(username, password):
-    """Перевіряє логін та пароль. Повертає True/False."""
-    if not username or not password:
-        return False
-    with engine.connect() as conn:
-        row = conn.execute(
-            text("SELECT password_hash FROM users WHERE username=:u"), 
-            {"u": username}
-        ).fetchone()
-    if not row:
-        return False
-    
-    stored_hash = row[0]
-    return bcrypt.checkpw(password.encode('utf-8'), stored_hash)
+# Зчитування меню з CSV (або XLSX)
+# Припустимо, що файл лежить в одній папці з app.py
+MENU_PATH = 'Харчування.csv'
 
-# --------------------------------------------------------------------------------
-# Функції для журналу (логів)
-def add_log(user_id, date_value, weight_value, activity_value):
-    """Додає запис про вагу й активність у таблицю logs."""
-    with engine.connect() as conn:
-        conn.execute(
-            text("""INSERT INTO logs (user_id, date, weight, activity)
-                    VALUES (:uid, :d, :w, :a)"""),
-            {"uid": user_id, "d": date_value, "w": weight_value, "a": activity_value}
-        )
+_menu_cache_miss = threading.local()
 
-def get_logs(user_id):
-    """Отримує усі логи користувача з таблиці logs."""
-    with engine.connect() as conn:
-        data = conn.execute(
-            text("SELECT date, weight, activity FROM logs WHERE user_id=:uid ORDER BY date"),
-            {"uid": user_id}
-        ).fetchall()
-    # Перетворимо у DataFrame
-    if data:
-        df = pd.DataFrame(data, columns=['Дата', 'Вага', 'Активність'])
-        return df
-    else:
-        return pd.DataFrame(columns=['Дата', 'Вага', 'Активність'])
+# cache_resource, а не cache_data: модель лише читається, тож кожна сесія
+# отримує той самий об'єкт без копіювання (unpickle) на кожен rerun
+@st.cache_resource(max_entries=2)
+def _load_compiled_menu(path, mtime_ns):
+    """mtime_ns — частина ключа кешу, щоб змінене меню підхоплювалось без перезапуску."""
+    _menu_cache_miss.flag = True  # тіло виконується лише при промаху кешу
+    return load_compiled_menu(path)
 
-# --------------------------------------------------------------------------------
-# Функції для push-нагадувань (демо-реалізація)
-def add_reminder(user_id, reminder_time, message):
-    with engine.connect() as conn:
-        conn.execute(
-            text("""INSERT INTO reminders (user_id, reminder_time, message)
-                    VALUES (:uid, :rt, :m)"""),
-            {"uid": user_id, "rt": reminder_time, "m": message}
-        )
+@timed('menu.load_menu')
+def load_menu(path=MENU_PATH):
+    """Повертає MenuModel (калорії, інгредієнти, індекс за днями) з дискового кешу."""
+    _menu_cache_miss.flag = False
+    model = _load_compiled_menu(path, source_mtime(path))
+    record_cache('menu_streamlit', not _menu_cache_miss.flag)
+    return model
 
-def get_reminders(user_id):
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text("SELECT id, reminder_time, message FROM reminders WHERE user_id=:uid"),
-            {"uid": user_id}
-        ).fetchall()
-    if rows:
-        df = pd.DataFrame(rows, columns=['ID', 'Час нагадування', 'Повідомлення'])
-        return df
-    else:
-        return pd.DataFrame(columns=['ID', 'Час нагадування', 'Повідомлення'])
+menu_model = load_menu()
+menu_df = menu_model.df
 
-def delete_reminder(reminder_id):
-    with engine.connect() as conn:
-        conn.execute(
-            text("DELETE FROM reminders WHERE id=:rid"),
-            {"rid": reminder_id}
-        )
+@st.cache_resource(max_entries=2)
+def _menu_planner(path, mtime_ns):
+    """Вектори калорій і продуктів для планувальника — один раз на версію меню."""
+    return MenuPlanner(load_menu(path))
 
-# --------------------------------------------------------------------------------
-# Зчитування меню з CSV
-# Припустимо, що файл лежить в одній папці з app.py
-@st.cache_data
-def load_menu():
-    df = pd.read_csv('Харчування.csv', encoding='utf-8-sig').dropna()
-    return df
+def get_menu_planner(path=MENU_PATH):
+    return _menu_planner(path, source_mtime(path))
 
-menu_df = load_menu()
+# Кроки агрегації історії журналу (див. history.py)
+RESOLUTIONS = {'Авто': 'auto', 'День': 'day', 'Тиждень': 'week', 'Місяць': 'month'}
 
 # --------------------------------------------------------------------------------
-# Допоміжні функції для меню
-def extract_calories(text):
-    """
-    Витягує сумарні калорії з рядка (наприклад, "Омлет 350 ккал" -> 350).
-    Якщо таких вказівок кілька, підсумовуємо.
-    """
-    matches = re.findall(r'(\d+)\s?ккал', text)
-    return sum(map(int, matches)) if matches else 0
+# IP клієнта для обмеження спроб входу (None, якщо Streamlit його не надає).
+# X-Forwarded-For задає сам клієнт, тож йому віримо лише за власним проксі:
+# FOOD_APP_TRUSTED_PROXY_HOPS — скільки наших проксі стоїть перед застосунком,
+# а IP клієнта — запис, який додав найдальший із них (N-й з кінця).
+TRUSTED_PROXY_HOPS = int(os.environ.get('FOOD_APP_TRUSTED_PROXY_HOPS', 0))
+
+def get_client_ip():
+    context = getattr(st, 'context', None)
+    if TRUSTED_PROXY_HOPS > 0:
+        headers = getattr(context, 'headers', None) or {}
+        forwarded = [ip.strip() for ip in headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return getattr(context, 'ip_address', None) or None
 
 # --------------------------------------------------------------------------------
 # ОТОЖ, ПОЧИНАЄМО ЛОГІКУ ДОДАТКА
@@ -181,6 +111,8 @@ def main():
 
     if 'user' not in st.session_state:
         st.session_state['user'] = None
+    if 'user_ctx' not in st.session_state:
+        st.session_state['user_ctx'] = None
     
     # ----------------------
     # Авторизація / Реєстрація
@@ -190,232 +122,395 @@ def main():
     password_input = st.sidebar.text_input("Пароль:", type='password')
     
     if st.sidebar.button("Увійти" if login_mode == "Вхід" else "Зареєструватися"):
-        if login_mode == "Вхід":
-            if login_user(username_input, password_input):
-                st.session_state['user'] = username_input
-                st.sidebar.success(f"Ласкаво просимо, {username_input}!")
-            else:
-                st.sidebar.error("Невірні ім'я користувача або пароль!")
-        else:  # Реєстрація
-            created = create_user(username_input, password_input)
-            if created:
-                st.sidebar.success(f"Користувач {username_input} зареєстрований успішно!")
-                st.session_state['user'] = username_input
-            else:
-                st.sidebar.error("Такий користувач вже існує або некоректні дані!")
+        client_ip = get_client_ip()
+        try:
+            if login_mode == "Вхід":
+                if login_user(username_input, password_input, client_ip):
+                    st.session_state['user'] = username_input
+                    st.session_state['user_ctx'] = UserContext.for_user(username_input)
+                    st.sidebar.success(f"Ласкаво просимо, {username_input}!")
+                else:
+                    st.sidebar.error("Невірні ім'я користувача або пароль!")
+            else:  # Реєстрація
+                created = create_user(username_input, password_input, client_ip)
+                if created:
+                    st.sidebar.success(f"Користувач {username_input} зареєстрований успішно!")
+                    st.session_state['user'] = username_input
+                    st.session_state['user_ctx'] = UserContext.for_user(username_input)
+                else:
+                    st.sidebar.error("Такий користувач вже існує або некоректні дані!")
+        except LoginThrottled as e:
+            st.sidebar.error(f"Забагато спроб. Спробуйте через {e.retry_after} с.")
     
     # Якщо немає авторизованого користувача — припиняємо роботу
     if not st.session_state['user']:
         st.warning("Будь ласка, авторизуйтесь або зареєструйтесь.")
         return
     # -------------------------------------------------------------------------
-    # Отримуємо user_id з бази
-    user_id = get_user_id(st.session_state['user'])
+    # Контекст користувача (user_id + кеш журналу й нагадувань) живе в сесії,
+    # тож звичайний rerun не звертається до бази
+    user_ctx = st.session_state['user_ctx']
+    if user_ctx is None or user_ctx.username != st.session_state['user']:
+        user_ctx = UserContext.for_user(st.session_state['user'])
+        st.session_state['user_ctx'] = user_ctx
+    if user_ctx is None:
+        # Користувача видалили з бази під час сесії
+        st.session_state['user'] = None
+        st.warning("Будь ласка, авторизуйтесь або зареєструйтесь.")
+        return
 
     # Блок із можливістю вийти
     if st.sidebar.button("Вийти"):
         st.session_state['user'] = None
-        st.experimental_rerun()
+        st.session_state['user_ctx'] = None
+        st.rerun()
 
     # -------------------------------------------------------------------------
     # Бічна панель: Калькулятор ІМТ
-    st.sidebar.header("🧮 Калькулятор ІМТ")
-    weight_sidebar = st.sidebar.number_input("Вага (кг):", 30.0, 200.0, 80.0)
-    height_sidebar = st.sidebar.number_input("Зріст (см):", 100, 220, 170)
-    bmi = weight_sidebar / ((height_sidebar / 100)**2)
-    st.sidebar.metric("Ваш ІМТ:", f"{bmi:.2f}")
+    with st.sidebar:
+        render_bmi_calculator()
 
     # -------------------------------------------------------------------------
-    # Головні вкладки
+    # Головні вкладки. Кожна вкладка складається з фрагментів: взаємодія з
+    # віджетом перезапускає лише свій фрагмент, а не всі три вкладки.
     tabs = st.tabs(["Меню та покупки", "Журнал ваги та активності", "Пуш-нагадування"])
-
-    # ========================== 1. МЕНЮ ТА СПИСОК ПОКУПОК =====================
     with tabs[0]:
-        st.subheader("Меню та автоматичний список покупок")
-
-        # --- (A) Відображення меню ---
-        st.markdown("### Меню з файлу `Харчування.csv`")
-
-        # Можливість вибрати фільтрацію за днем тижня **або** конкретною датою
-        # (якщо у CSV є реальні дати у полі 'Дні')
-        unique_days = menu_df['Дні'].unique().tolist()
-
-        # Вибір: або ми фільтруємо за днем, або за датою
-        day_or_date = st.selectbox("Оберіть день/дату:", unique_days)
-        filtered_menu = menu_df[menu_df['Дні'].astype(str).str.lower() == str(day_or_date).lower()]
-
-        # Витягуємо калорійність для кожного запису
-        filtered_menu['Калорії (Павло)'] = filtered_menu['Страва (рецепт, калорії, техкарта)'].apply(extract_calories)
-        # Можна припустити, що Наталя споживає ~80% калорій від Павла:
-        filtered_menu['Калорії (Наталя)'] = (filtered_menu['Калорії (Павло)'] * 0.8).astype(int)
+        render_menu_tab(user_ctx)
+    with tabs[1]:
+        render_journal_tab(user_ctx)
+    with tabs[2]:
+        render_reminders_tab(user_ctx)
 
-        # Відображення меню
-        if filtered_menu.empty:
-            st.info("Немає даних на цей день/дату.")
+# --------------------------------------------------------------------------------
+# Часткові reruns (st.fragment)
+def fragment(fn):
+    """
+    st.fragment, що веде статистику і для часткових reruns: rerun фрагмента
+    не виконує решту скрипта, тож і start_rerun() угорі файлу не викликається.
+    """
+    @functools.wraps(fn)
+    def instrumented(*args, **kwargs):
+        own_rerun = current_rerun() is None
+        if own_rerun:
+            start_rerun()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if own_rerun:
+                finish_rerun()
+    return st.fragment(instrumented)
+
+def rerun_fragment():
+    """Перезапускає лише поточний фрагмент (під час повного rerun — весь скрипт)."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+@fragment
+def render_bmi_calculator():
+    st.header("🧮 Калькулятор ІМТ")
+    weight_sidebar = st.number_input("Вага (кг):", 30.0, 200.0, 80.0)
+    height_sidebar = st.number_input("Зріст (см):", 100, 220, 170)
+    bmi = weight_sidebar / ((height_sidebar / 100)**2)
+    st.metric("Ваш ІМТ:", f"{bmi:.2f}")
+
+# ========================== 1. МЕНЮ ТА СПИСОК ПОКУПОК =====================
+def render_menu_tab(user_ctx):
+    st.subheader("Меню та автоматичний список покупок")
+
+    # Склад домогосподарства (за замовчуванням — двоє, як у меню)
+    household = Household(user_ctx.household_members(), menu_model.reference_daily_calories)
+    render_household_editor(user_ctx, household)
+    render_menu_day(household)
+    render_shopping_list(household)
+    render_menu_plan(household)
+
+@fragment
+def render_household_editor(user_ctx, household):
+    with st.expander(f"👪 Домогосподарство: {len(household.members)} ос."):
+        st.caption(
+            "Масштаб — частка від базової порції меню (1.0 = 'Порція для чоловіка'). "
+            "Якщо задано ціль (ккал/день), масштаб рахується з неї."
+        )
+        members_df = pd.DataFrame(
+            household.members, columns=['Ім\'я', 'Масштаб', 'Ціль (ккал/день)']
+        )
+        edited_members = st.data_editor(members_df, num_rows='dynamic', hide_index=True)
+        if st.button("Зберегти склад"):
+            edited_members = edited_members.dropna(subset=['Ім\'я'])
+            user_ctx.set_household_members([
+                (str(name).strip(),
+                 1.0 if pd.isna(scale) else float(scale),
+                 None if pd.isna(target) else int(target))
+                for name, scale, target in edited_members.itertuples(index=False)
+                if str(name).strip()
+            ])
+            # Склад впливає на всю вкладку — перезапускаємо застосунок повністю
+            st.rerun()
+
+@fragment
+def render_menu_day(household):
+    # --- (A) Відображення меню ---
+    st.markdown("### Меню з файлу `Харчування.csv`")
+
+    # Можливість вибрати фільтрацію за днем тижня **або** конкретною датою
+    # (якщо у CSV є реальні дати у полі 'Дні')
+    unique_days = menu_model.days
+
+    # Вибір: або ми фільтруємо за днем, або за датою
+    day_or_date = st.selectbox("Оберіть день/дату:", unique_days, key='menu_day')
+    # Калорії вже пораховані в load_menu(), день шукаємо за індексом
+    filtered_menu = menu_model.day(day_or_date)
+
+    # Відображення меню
+    if filtered_menu.empty:
+        st.info("Немає даних на цей день/дату.")
+    else:
+        for idx, row in filtered_menu.iterrows():
+            st.write(f"**{row['Час прийому їжі']}**")
+            st.write(f"- Рецепт: {row['Страва (рецепт, калорії, техкарта)']}")
+            st.write(f"- Порція для чоловіка: {row['Порція для чоловіка']}")
+            st.write(f"- Порція для дружини: {row['Порція для дружини']}")
+            st.write("---")
+
+        # Калорії всіх членів — одна матриця (прийоми їжі × члени)
+        calories_df = household.calorie_matrix(filtered_menu)
+        st.write("#### Калорійність (ккал)")
+        st.dataframe(calories_df)
+        st.bar_chart(calories_df, stack=False)
+
+@fragment
+def render_shopping_list(household):
+    # --- (B) Автоматичний список покупок ---
+    st.markdown("### Автоматичний список покупок")
+
+    # Вибираємо період, на скільки днів формувати список (від 1 до 7)
+    days_count = st.slider("На скільки днів вперед згенерувати список покупок?", 1, 7, 1)
+
+    # Для спрощення у прикладі: якщо у CSV `Дні` - це назви ("Понеділок", "Вівторок"...),
+    # то "кілька днів уперед" - це умовна операція.
+    # Якщо у CSV є реальні дати, ми можемо інтерпретувати date + days_count.
+
+    if st.button("Згенерувати список покупок"):
+        # День обирається у фрагменті меню; його значення беремо зі стану сесії
+        day_or_date = st.session_state.get('menu_day')
+        # Інгредієнти вже витягнуті в load_menu() (патерни на зразок
+        # "Молоко 200 мл", "Яйця 2 шт"); кількості з рецепту — це базова
+        # порція, тут вони масштабуються на всіх членів домогосподарства.
+        # Для реального застосування формат CSV має бути жорстко стандартизований.
+        df_shop = household.shopping_list(
+            menu_model.ingredients, menu_model.rows_for_days(day_or_date, days_count)
+        )
+        if df_shop.empty:
+            st.warning("Не вдалося знайти продукти у меню. Перевірте формат даних.")
         else:
-            for idx, row in filtered_menu.iterrows():
-                st.write(f"**{row['Час прийому їжі']}**")
-                st.write(f"- Рецепт: {row['Страва (рецепт, калорії, техкарта)']}")
-                st.write(f"- Павло: {row['Порція для чоловіка']} ({row['Калорії (Павло)']} ккал)")
-                st.write(f"- Наталя: {row['Порція для дружини']} ({row['Калорії (Наталя)']} ккал)")
-                st.write("---")
-
-            # Два графіки калорійності
-            colA, colB = st.columns(2)
-            with colA:
-                st.write("#### Калорійність (Павло)")
-                st.bar_chart(filtered_menu.set_index('Час прийому їжі')['Калорії (Павло)'])
-            with colB:
-                st.write("#### Калорійність (Наталя)")
-                st.bar_chart(filtered_menu.set_index('Час прийому їжі')['Калорії (Наталя)'])
-
-        # --- (B) Автоматичний список покупок ---
-        st.markdown("### Автоматичний список покупок")
-
-        # Вибираємо період, на скільки днів формувати список (від 1 до 7)
-        days_count = st.slider("На скільки днів вперед згенерувати список покупок?", 1, 7, 1)
-
-        # Для спрощення у прикладі: якщо у CSV `Дні` - це назви ("Понеділок", "Вівторок"...),
-        # то "кілька днів уперед" - це умовна операція.
-        # Якщо у CSV є реальні дати, ми можемо інтерпретувати date + days_count.
-
-        # (Демо) Виберемо індекс поточного дня/дати у списку unique_days:
-        if day_or_date in unique_days:
-            current_index = unique_days.index(day_or_date)
-            # Вибір наступних N днів
-            selected_days = []
-            for i in range(days_count):
-                new_index = current_index + i
-                if new_index < len(unique_days):
-                    selected_days.append(unique_days[new_index])
-                else:
-                    break
+            st.success(f"Список покупок сформовано на {household.portions:.1f} порцій!")
+            st.dataframe(df_shop, hide_index=True)
+
+@fragment
+def render_menu_plan(household):
+    # --- (C) Автоматичний план на тиждень ---
+    st.markdown("### Автоматичний план меню")
+    st.caption(
+        "Підбирає страви з меню так, щоб денна калорійність кожного члена "
+        "відповідала його цілі, а продуктів у списку покупок було якомога менше."
+    )
+    colT, colD = st.columns(2)
+    with colT:
+        # Члени з власною ціллю (див. 'Домогосподарство') планують під неї
+        if np.isnan(household.targets).any():
+            plan_target = st.number_input(
+                "Ціль для членів без власної (базова порція, ккал/день):", 800, 6000,
+                int(menu_model.reference_daily_calories) or 2000, 50,
+            )
         else:
-            selected_days = [day_or_date]
-
-        # Зберемо всі рядки меню, які потрапляють у вибрані дні
-        selected_menu = menu_df[menu_df['Дні'].isin(selected_days)]
-
-        # Ідея: нам потрібно аналізувати "Порція для чоловіка" та "Порція для дружини"
-        # й "Страва (рецепт, калорії, техкарта)", щоб знайти інгредієнти.
-        # Допустімо, що у рядку є фрагменти на зразок: "Молоко 200 мл", "Яйця 2 шт", ...
-        # Це ДЕМООБРОБКА: шукаємо патерн "<Назва> <кількість> (г|шт|мл)"
-        # Для реального застосування формат CSV має бути жорстко стандартизований.
+            plan_target = menu_model.reference_daily_calories
+            st.caption("Усі члени мають власні цілі калорій — план складається під них.")
+    with colD:
+        plan_days = st.number_input("Днів у плані:", 1, 31, 7)
+
+    menu_version = source_mtime(MENU_PATH)
+    if st.button("Скласти план"):
+        try:
+            plan = get_menu_planner().plan(
+                days=plan_days, target_calories=household.base_targets(plan_target)
+            )
+        except ValueError as e:
+            st.warning(f"Не вдалося скласти план: {e}")
+        else:
+            st.session_state['menu_plan'] = (menu_version, plan)
+
+    saved_plan = st.session_state.get('menu_plan')
+    # План, складений для попередньої версії меню, не показуємо
+    if saved_plan is not None and saved_plan[0] == menu_version:
+        plan = saved_plan[1]
+        st.write(
+            f"Продуктів у списку покупок: **{plan.products}** · "
+            f"пошук: {plan.elapsed_s * 1000:.0f} мс"
+        )
+        if plan.relaxed_slots:
+            st.caption(
+                "Страв замало, щоб не повторювати їх частіше за ліміт: "
+                + ", ".join(plan.relaxed_slots)
+            )
+        plan_table = plan.rows.assign(
+            Страва=plan.rows['Страва (рецепт, калорії, техкарта)'].map(dish_name)
+        ).pivot(index='День', columns='Слот', values='Страва')[get_menu_planner().slots]
+        st.dataframe(plan_table)
+
+        plan_calories = household.calorie_matrix(plan.rows)
+        plan_calories.index = plan.rows['День'].to_numpy()
+        st.write("#### Калорійність плану за днями (ккал)")
+        st.dataframe(plan_calories.groupby(level=0).sum())
+
+        st.write("#### Список покупок за планом")
+        st.dataframe(
+            household.shopping_list(menu_model.ingredients, plan.rows), hide_index=True
+        )
 
-        def parse_ingredients(text):
-            """
-            Шукає патерни типу 'Продукт_Слово 123 шт/г/мл'.
-            Повертає список кортежів [('Продукт', 123, 'шт'), ...]
-            """
-            # Ось простий приклад пошуку (укр.+англ. літери, цифри + одиниці).
-            pattern = r'([А-Яа-яЇїІіЄєҐґA-Za-z0-9]+)\s(\d+)\s?(шт|г|мл|kg|гр|кг)?'
-            found = re.findall(pattern, text)
-            # found = [('Яйця', '2', 'шт'), ('Молоко', '200', 'мл'), ...]
-            # Приведемо кількість до int
-            results = []
-            for f in found:
-                product_name = f[0]
-                qty = int(f[1])
-                unit = f[2] if f[2] else ''  # якщо одиниця пуста
-                results.append((product_name, qty, unit))
-            return results
-        
-        # Збираємо інгредієнти з усіх стовпців, де може бути текст порцій
-        # (з рецепту, з порції для чоловіка, з порції для дружини)
-        all_ingredients = {}
-
-        for _, row in selected_menu.iterrows():
-            # Обробка рецепту
-            ing_recipe = parse_ingredients(str(row['Страва (рецепт, калорії, техкарта)']))
-            # Обробка порції для чоловіка
-            ing_man = parse_ingredients(str(row['Порція для чоловіка']))
-            # Обробка порції для дружини
-            ing_woman = parse_ingredients(str(row['Порція для дружини']))
-            combined = ing_recipe + ing_man + ing_woman
-            
-            for (name, qty, unit) in combined:
-                key = (name.lower(), unit.lower())  # ключ для унікального продукту+одиниці
-                if key not in all_ingredients:
-                    all_ingredients[key] = 0
-                all_ingredients[key] += qty
-
-        if st.button("Згенерувати список покупок"):
-            if not all_ingredients:
-                st.warning("Не вдалося знайти продукти у меню. Перевірте формат даних.")
+# ===================== 2. ЖУРНАЛ ВАГИ ТА АКТИВНОСТІ =======================
+@fragment
+def render_journal_tab(user_ctx):
+    st.subheader("Журнал ваги та активності")
+
+    # Форма додавання нового запису
+    today = datetime.date.today()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        date_input = st.date_input("Дата:", today)
+    with col2:
+        weight_input = st.number_input("Вага (кг):", 30.0, 300.0, 70.0)
+    with col3:
+        activity_input = st.slider("Активність (хв/день):", 0, 300, 30, 10)
+
+    if st.button("Додати запис"):
+        user_ctx.add_log(date_input, weight_input, activity_input)
+        st.success("Запис успішно збережено!")
+
+    # Масовий імпорт / експорт журналу (CSV або XLSX, напр. з фітнес-трекера)
+    with st.expander("Імпорт / експорт журналу"):
+        uploaded = st.file_uploader(
+            "Файл зі стовпцями Дата, Вага, Активність:", type=['csv', 'xlsx']
+        )
+        if uploaded is not None and st.button("Імпортувати"):
+            try:
+                imported, skipped = user_ctx.import_logs(uploaded, uploaded.name)
+            except ValueError as e:
+                st.error(f"Не вдалося імпортувати файл: {e}")
             else:
-                st.success("Список покупок сформовано!")
-                shop_list = []
-                for (name_unit, total_qty) in all_ingredients.items():
-                    product_name, product_unit = name_unit
-                    if product_unit == '':
-                        product_unit = 'шт'  # умовно, якщо не знайдено
-                    shop_list.append((product_name.capitalize(), total_qty, product_unit))
-                
-                df_shop = pd.DataFrame(shop_list, columns=['Продукт', 'Кількість', 'Од.'])
-                st.dataframe(df_shop)
-
-    # ===================== 2. ЖУРНАЛ ВАГИ ТА АКТИВНОСТІ =======================
-    with tabs[1]:
-        st.subheader("Журнал ваги та активності")
-
-        # Форма додавання нового запису
-        today = datetime.date.today()
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            date_input = st.date_input("Дата:", today)
-        with col2:
-            weight_input = st.number_input("Вага (кг):", 30.0, 300.0, 70.0)
-        with col3:
-            activity_input = st.slider("Активність (хв/день):", 0, 300, 30, 10)
-
-        if st.button("Додати запис"):
-            add_log(user_id, date_input, weight_input, activity_input)
-            st.success("Запис успішно додано!")
-
-        # Показуємо поточні логи
-        logs_df = get_logs(user_id)
-        if logs_df.empty:
-            st.info("Поки що немає записів у журналі.")
+                st.success(f"Імпортовано записів: {imported}. Пропущено некоректних: {skipped}.")
+
+        export_format = st.radio("Формат експорту:", ['csv', 'xlsx'], horizontal=True)
+        if st.button("Підготувати експорт"):
+            st.download_button(
+                "Завантажити журнал",
+                data=export_logs_bytes(user_ctx.user_id, export_format),
+                file_name=f"journal.{export_format}",
+            )
+
+    # Показуємо історію: агрегати за обраний період рахуються в SQL,
+    # тож розмір таблиці та графіків не залежить від довжини журналу
+    first_date, last_date = user_ctx.log_bounds()
+    if first_date is None:
+        st.info("Поки що немає записів у журналі.")
+    else:
+        colP, colR = st.columns([2, 1])
+        with colP:
+            period = st.date_input(
+                "Період:",
+                (max(first_date, last_date - datetime.timedelta(days=365)), last_date),
+                min_value=first_date,
+                max_value=max(last_date, today),
+            )
+        with colR:
+            resolution_label = st.selectbox("Крок:", list(RESOLUTIONS))
+
+        # Поки в date_input обрано лише початок діапазону — беремо один день
+        start_date, end_date = period if len(period) == 2 else (period[0], period[0])
+        history_df = user_ctx.log_history(
+            start_date, end_date, RESOLUTIONS[resolution_label]
+        )
+        if history_df.empty:
+            st.info("Немає записів за обраний період.")
         else:
-            st.dataframe(logs_df)
-
-            # Графік ваги (лінійний)
-            st.line_chart(data=logs_df.set_index('Дата')['Вага'])
+            shown_resolution = history_df.attrs.get('resolution')
+            if RESOLUTIONS[resolution_label] not in ('auto', shown_resolution):
+                shown_label = {v: k for k, v in RESOLUTIONS.items()}.get(shown_resolution)
+                st.caption(f"Діапазон задовгий для цього кроку — показано з кроком «{shown_label}».")
+            st.dataframe(history_df)
+
+            # Графік ваги з лінією тренду (лінійний)
+            st.line_chart(data=history_df.set_index('Період')[['Вага', 'Тренд ваги']])
             # Графік активності (стовпчиковий)
-            st.bar_chart(data=logs_df.set_index('Дата')['Активність'])
+            st.bar_chart(data=history_df.set_index('Період')['Активність'])
+
+# ===================== 3. ПУШ-НАГАДУВАННЯ (ДЕМО) =========================
+@fragment
+def render_reminders_tab(user_ctx):
+    st.subheader("Нагадування про прийоми їжі (демо)")
+    st.write("**Увага:** для реальних push-повідомлень потрібен зовнішній сервіс (Firebase, Telegram-бот тощо).")
+
+    # Виведемо таблицю існуючих нагадувань
+    reminders_df = user_ctx.reminders()
+    if not reminders_df.empty:
+        st.dataframe(reminders_df)
+        # Додавання можливості видаляти нагадування
+        reminder_to_delete = st.selectbox("ID нагадування для видалення:", [0] + reminders_df['ID'].tolist())
+        if reminder_to_delete != 0:
+            if st.button("Видалити обране нагадування"):
+                user_ctx.delete_reminder(reminder_to_delete)
+                st.success("Нагадування видалено!")
+                rerun_fragment()
+    else:
+        st.info("Немає жодного нагадування.")
 
-    # ===================== 3. ПУШ-НАГАДУВАННЯ (ДЕМО) =========================
-    with tabs[2]:
-        st.subheader("Нагадування про прийоми їжі (демо)")
-        st.write("**Увага:** для реальних push-повідомлень потрібен зовнішній сервіс (Firebase, Telegram-бот тощо).")
-
-        # Виведемо таблицю існуючих нагадувань
-        reminders_df = get_reminders(user_id)
-        if not reminders_df.empty:
-            st.dataframe(reminders_df)
-            # Додавання можливості видаляти нагадування
-            reminder_to_delete = st.selectbox("ID нагадування для видалення:", [0] + reminders_df['ID'].tolist())
-            if reminder_to_delete != 0:
-                if st.button("Видалити обране нагадування"):
-                    delete_reminder(reminder_to_delete)
-                    st.success("Нагадування видалено!")
-                    st.experimental_rerun()
-        else:
-            st.info("Немає жодного нагадування.")
+    # Форма для створення нагадування
+    colA, colB = st.columns(2)
+    with colA:
+        reminder_time = st.time_input("Час нагадування:", datetime.time(8, 0))
+    with colB:
+        message = st.text_input("Текст повідомлення:", value="Час їсти! 🍽️")
 
-        # Форма для створення нагадування
-        colA, colB = st.columns(2)
-        with colA:
-            reminder_time = st.time_input("Час нагадування:", datetime.time(8, 0))
-        with colB:
-            message = st.text_input("Текст повідомлення:", value="Час їсти! 🍽️")
+    if st.button("Додати нагадування"):
+        # Збережемо в базі
+        user_ctx.add_reminder(str(reminder_time), message)
+        st.success("Нагадування додано!")
+        rerun_fragment()
 
-        if st.button("Додати нагадування"):
-            # Збережемо в базі
-            add_reminder(user_id, str(reminder_time), message)
-            st.success("Нагадування додано!")
-            st.experimental_rerun()
+# --------------------------------------------------------------------------------
+# Панель профілювання (для адміністраторів або з FOOD_APP_DEBUG=1)
+def debug_panel_enabled():
+    if os.environ.get('FOOD_APP_DEBUG') == '1':
+        return True
+    admins = {name.strip() for name in os.environ.get('FOOD_APP_ADMINS', '').split(',') if name.strip()}
+    return st.session_state.get('user') in admins
+
+def render_debug_panel(stats):
+    """Показує спани, SQL-запити й кеші щойно завершеного rerun."""
+    data = stats.as_dict()
+    with st.sidebar.expander("⏱️ Профілювання rerun"):
+        st.metric("Час rerun", f"{data['total_ms']:.1f} мс")
+        st.write(f"SQL-запитів: {data['sql_queries']}")
+        if data['spans']:
+            spans_df = pd.DataFrame([
+                (name, s['count'], s['total_ms']) for name, s in data['spans'].items()
+            ], columns=['Спан', 'Викликів', 'мс']).sort_values('мс', ascending=False)
+            st.dataframe(spans_df, hide_index=True)
+        if data['cache']:
+            cache_df = pd.DataFrame([
+                (name, c['hits'], c['misses'], c['hits'] / (c['hits'] + c['misses']))
+                for name, c in data['cache'].items()
+            ], columns=['Кеш', 'Влучань', 'Промахів', 'Частка влучань'])
+            st.dataframe(cache_df, hide_index=True)
+        st.caption("Накопичувальні лічильники процесу (Prometheus):")
+        st.code(prometheus_text(), language='text')
 
 # Запуск основної функції
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        rerun_stats = finish_rerun()
+    if debug_panel_enabled():
+        render_debug_panel(rerun_stats)
@@ -0,0 +1,213 @@
+"""
+Сервіс автентифікації.
+
+bcrypt виконується в обмеженому пулі потоків (bcrypt відпускає GIL), а не
+безконтрольно в кожному потоці сесії: одночасних хешувань не більше за
+кількість воркерів, черга обмежена, тож під навантаженням затримка входу
+передбачувана. Спроби входу обмежуються ковзним вікном на ім'я
+користувача та на IP, а для невідомих імен виконується та сама перевірка
+з фіктивним хешем, щоб час відповіді не видавав, чи існує користувач.
+"""
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+import db
+
+# Налаштування (можна перевизначити змінними середовища)
+BCRYPT_ROUNDS = int(os.environ.get('FOOD_APP_BCRYPT_ROUNDS', 12))
+AUTH_WORKERS = int(os.environ.get('FOOD_APP_AUTH_WORKERS', 4))
+AUTH_QUEUE_SIZE = AUTH_WORKERS * 4
+AUTH_QUEUE_WAIT_S = 5
+
+ATTEMPT_WINDOW_S = 300
+MAX_ATTEMPTS_PER_USER = 5   # невдалих спроб на ім'я за вікно
+MAX_ATTEMPTS_PER_IP = 20    # будь-яких спроб з одного IP за вікно
+MAX_TRACKED_KEYS = 10000    # скільки імен / IP лімітер тримає в пам'яті
+
+
+class LoginThrottled(Exception):
+    """Забагато спроб (або сервіс перевантажений) — спробуйте пізніше."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Забагато спроб, спробуйте через {retry_after} с")
+        self.retry_after = retry_after
+
+
+# --------------------------------------------------------------------------------
+# Обмеження кількості спроб
+class AttemptLimiter:
+    """
+    Ковзне вікно: не більше max_attempts спроб на ключ за window_s секунд.
+    Ключі, яких більше не бачили, прибираються раз на вікно, а кількість
+    ключів обмежена max_keys, тож перебір імен чи IP не роздуває пам'ять.
+    """
+
+    def __init__(self, max_attempts, window_s=ATTEMPT_WINDOW_S, max_keys=MAX_TRACKED_KEYS):
+        self.max_attempts = max_attempts
+        self.window_s = window_s
+        self.max_keys = max_keys
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + window_s
+
+    def __len__(self):
+        return len(self._attempts)
+
+    def _prune(self, key, now):
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return None
+        while attempts and attempts[0] <= now - self.window_s:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+            return None
+        return attempts
+
+    def retry_after(self, key):
+        """Скільки секунд чекати до наступної спроби (0 — можна зараз)."""
+        if key is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._prune(key, now)
+            if attempts is None or len(attempts) < self.max_attempts:
+                return 0
+            return max(1, int(attempts[0] + self.window_s - now) + 1)
+
+    def _sweep(self, now):
+        """Прибирає прострочені ключі; якщо їх усе ще забагато — найстаріші."""
+        for key in list(self._attempts):
+            self._prune(key, now)
+        self._next_sweep = now + self.window_s
+        # Словник упорядкований за першою спробою ключа; звільняємо з запасом,
+        # щоб під перебором не проходити весь словник на кожній спробі
+        if len(self._attempts) >= self.max_keys:
+            excess = len(self._attempts) - self.max_keys * 9 // 10
+            for key in list(self._attempts)[:excess]:
+                del self._attempts[key]
+
+    def record(self, key):
+        if key is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep or len(self._attempts) >= self.max_keys:
+                self._sweep(now)
+            self._attempts.setdefault(key, deque()).append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+# --------------------------------------------------------------------------------
+def _hash_rounds(password_hash):
+    """Вартість (work factor) із bcrypt-хешу виду $2b$12$..."""
+    try:
+        return int(password_hash[4:6])
+    except (TypeError, ValueError):
+        return None
+
+
+class AuthService:
+    """Реєстрація та вхід з bcrypt у пулі потоків і обмеженням спроб."""
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=AUTH_WORKERS,
+                 queue_size=AUTH_QUEUE_SIZE):
+        self.rounds = rounds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='auth')
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self.user_limiter = AttemptLimiter(MAX_ATTEMPTS_PER_USER)
+        self.ip_limiter = AttemptLimiter(MAX_ATTEMPTS_PER_IP)
+        self._dummy_hash = None
+        self._dummy_lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        """Виконує fn у пулі; якщо черга повна довше за AUTH_QUEUE_WAIT_S — відмова."""
+        if not self._slots.acquire(timeout=AUTH_QUEUE_WAIT_S):
+            raise LoginThrottled(1)
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def _dummy(self):
+        """Фіктивний хеш тієї ж вартості для невідомих користувачів."""
+        with self._dummy_lock:
+            if self._dummy_hash is None:
+                self._dummy_hash = self._run(
+                    bcrypt.hashpw, secrets.token_bytes(16), bcrypt.gensalt(self.rounds)
+                )
+            return self._dummy_hash
+
+    def _check_limits(self, username, client_ip):
+        retry_after = max(
+            self.user_limiter.retry_after(username),
+            self.ip_limiter.retry_after(client_ip),
+        )
+        if retry_after:
+            raise LoginThrottled(retry_after)
+
+    def login(self, username, password, client_ip=None):
+        """Перевіряє логін та пароль. Повертає True/False або кидає LoginThrottled."""
+        if not username or not password:
+            return False
+        self._check_limits(username, client_ip)
+        self.ip_limiter.record(client_ip)
+
+        password_bytes = password.encode('utf-8')
+        stored_hash = db.get_password_hash(username)
+        if stored_hash is None:
+            # Той самий обсяг роботи, що й для справжнього користувача
+            self._run(bcrypt.checkpw, password_bytes, self._dummy())
+            ok = False
+        else:
+            ok = self._run(bcrypt.checkpw, password_bytes, stored_hash)
+
+        if not ok:
+            self.user_limiter.record(username)
+            return False
+
+        self.user_limiter.reset(username)
+        if _hash_rounds(stored_hash) != self.rounds:
+            # Змінили work factor — перехешовуємо пароль при вдалому вході
+            db.update_password_hash(
+                username, self._run(bcrypt.hashpw, password_bytes, bcrypt.gensalt(self.rounds))
+            )
+        return True
+
+    def create_user(self, username, password, client_ip=None):
+        """Створюємо нового користувача, якщо такого немає. Повертає True/False."""
+        if not username or not password:
+            return False
+        self._check_limits(None, client_ip)
+        self.ip_limiter.record(client_ip)
+
+        if db.get_user_id(username) is not None:
+            return False
+        password_hash = self._run(
+            bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds)
+        )
+        return db.insert_user(username, password_hash)
+
+
+# Один сервіс (і один пул) на процес для всіх сесій
+auth_service = AuthService()
+
+
+def login_user(username, password, client_ip=None):
+    return auth_service.login(username, password, client_ip)
+
+
+def create_user(username, password, client_ip=None):
+    return auth_service.create_user(username, password, client_ip)
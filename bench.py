@@ -0,0 +1,214 @@
+"""
+Бенчмарки гарячих шляхів застосунку без Streamlit.
+
+Генерує синтетичні меню (від сотень до сотень тисяч рядків) та бази
+(від тисяч до мільйона записів журналу) у тимчасовій теці і міряє:
+
+- load_menu: розбір CSV + компіляція MenuModel (холодний старт) та
+  читання з дискового кешу;
+- вибір дня разом із калоріями;
+- список покупок на 7 днів;
+- add_log / get_logs / get_reminders / get_log_history.
+
+Результат — JSON із перцентилями затримки (мс) і піковою пам'яттю (KiB):
+
+    python bench.py --menu-rows 100 1000 100000 --log-rows 1000 1000000 --out bench.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import db
+import history
+from household import DEFAULT_MEMBERS, Household
+from menu_cache import load_compiled_menu, read_menu_source
+from menu_model import (
+    DAY_COL, MAN_PORTION_COL, MEAL_COL, RECIPE_COL, WOMAN_PORTION_COL,
+    build_menu_model, compute_calories,
+)
+
+MEALS = ['08:00 (Сніданок)', '11:00 (Перекус 1)', '13:30 (Обід)',
+         '16:30 (Перекус 2)', '20:00 (Вечеря)']
+PRODUCTS = ['Яйця', 'Шпинат', 'Помідори', 'Курка', 'Рис', 'Гречка', 'Йогурт',
+            'Ягоди', 'Риба', 'Броколі', 'Морква', 'Сир', 'Молоко', 'Авокадо']
+UNITS = ['г', 'шт', 'мл', 'кг', 'гр', 'л']
+LOGS_PER_USER = 1000
+
+
+# --------------------------------------------------------------------------------
+# Вимірювання
+def measure(fn, repeat, warmup=1):
+    """Запускає fn repeat разів; повертає перцентилі (мс) і пікову пам'ять (KiB)."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Пам'ять міряємо окремим прогоном: tracemalloc суттєво сповільнює код
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = np.array(timings)
+    return {
+        'runs': repeat,
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+        'mean_ms': round(float(timings.mean()), 3),
+        'max_ms': round(float(timings.max()), 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+# --------------------------------------------------------------------------------
+# Синтетичні дані
+def make_menu(rows, seed=0):
+    """Меню на rows рядків: по 5 прийомів їжі на день, рецепти з інгредієнтами."""
+    rnd = random.Random(seed)
+    records = []
+    for i in range(rows):
+        ingredients = '\n'.join(
+            f" - {rnd.choice(PRODUCTS)} {rnd.randint(1, 300)} {rnd.choice(UNITS)}"
+            for _ in range(rnd.randint(2, 6))
+        )
+        kcal = rnd.randint(100, 700)
+        records.append({
+            DAY_COL: f"День {i // len(MEALS) + 1}",
+            MEAL_COL: MEALS[i % len(MEALS)],
+            RECIPE_COL: f"Страва {i}:\n{ingredients}\n\n Калорії:\n - Чоловік: {kcal} ккал",
+            MAN_PORTION_COL: f"{rnd.randint(100, 300)} г {rnd.choice(PRODUCTS).lower()}",
+            WOMAN_PORTION_COL: f"{rnd.randint(80, 250)} г {rnd.choice(PRODUCTS).lower()}",
+        })
+    return pd.DataFrame(records)
+
+
+def make_database(path, log_rows, seed=0):
+    """База з log_rows записами журналу (по LOGS_PER_USER на користувача)."""
+    rnd = random.Random(seed)
+    db.configure_engine(f"sqlite:///{path}")
+    db.create_tables()
+    users = max(1, log_rows // LOGS_PER_USER)
+    start = datetime.date(2000, 1, 1)
+    user_ids = []
+    for u in range(users):
+        db.insert_user(f"bench{u}", b"x")
+        user_id = db.get_user_id(f"bench{u}")
+        user_ids.append(user_id)
+        count = min(LOGS_PER_USER, log_rows - u * LOGS_PER_USER)
+        db.add_logs_bulk(user_id, (
+            ((start + datetime.timedelta(days=d)).isoformat(),
+             round(rnd.uniform(50, 110), 1), rnd.randint(0, 180))
+            for d in range(count)
+        ))
+        for h in range(3):
+            db.add_reminder(user_id, f"{8 + 4 * h:02d}:00:00", "Час їсти!")
+    return user_ids
+
+
+# --------------------------------------------------------------------------------
+# Сценарії
+def bench_menu(rows, repeat, workdir):
+    menu_path = os.path.join(workdir, f"menu_{rows}.csv")
+    make_menu(rows).to_csv(menu_path, index=False, encoding='utf-8-sig')
+    cache_dir = os.path.join(workdir, f"cache_{rows}")
+    model = load_compiled_menu(menu_path, cache_dir)
+    days = model.days
+    picks = [days[i % len(days)] for i in range(0, len(days), max(1, len(days) // 50))]
+    state = {'i': 0}
+    household = Household(DEFAULT_MEMBERS, model.reference_daily_calories)
+
+    def next_day():
+        state['i'] += 1
+        return picks[state['i'] % len(picks)]
+
+    def day_with_calories():
+        rows_df = model.day(next_day())
+        compute_calories(rows_df[RECIPE_COL])
+
+    return {
+        'load_menu_cold': measure(
+            lambda: build_menu_model(read_menu_source(menu_path)), max(3, repeat // 5)),
+        'load_menu_cached': measure(
+            lambda: load_compiled_menu(menu_path, cache_dir), repeat),
+        'day_filter_calories': measure(day_with_calories, repeat),
+        'shopping_list_7d': measure(
+            lambda: household.shopping_list(model.ingredients, model.rows_for_days(next_day(), 7)),
+            repeat),
+    }
+
+
+def bench_db(log_rows, repeat, workdir):
+    user_ids = make_database(os.path.join(workdir, f"bench_{log_rows}.db"), log_rows)
+    rnd = random.Random(1)
+    state = {'day': datetime.date(2100, 1, 1)}
+
+    def add_log():
+        state['day'] += datetime.timedelta(days=1)
+        db.add_log(user_ids[0], state['day'], 75.0, 30)
+
+    last_year = (datetime.date(2000, 1, 1) + datetime.timedelta(days=LOGS_PER_USER - 365),
+                 datetime.date(2000, 1, 1) + datetime.timedelta(days=LOGS_PER_USER))
+    return {
+        'add_log': measure(add_log, repeat),
+        'get_logs': measure(lambda: db.get_logs(rnd.choice(user_ids)), repeat),
+        'get_reminders': measure(lambda: db.get_reminders(rnd.choice(user_ids)), repeat),
+        'get_log_history_year_auto': measure(
+            lambda: history.get_log_history(rnd.choice(user_ids), *last_year), repeat),
+    }
+
+
+# --------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки меню та SQLite-хелперів")
+    parser.add_argument('--menu-rows', type=int, nargs='*', default=[100, 1000, 10000],
+                        help="розміри синтетичних меню (рядків)")
+    parser.add_argument('--log-rows', type=int, nargs='*', default=[1000, 100000],
+                        help="розміри синтетичних журналів (записів)")
+    parser.add_argument('--repeat', type=int, default=30, help="повторів на сценарій")
+    parser.add_argument('--out', help="файл для JSON (за замовчуванням stdout)")
+    args = parser.parse_args(argv)
+
+    report = {
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'menu': {},
+        'db': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='food_bench_') as workdir:
+        for rows in args.menu_rows:
+            report['menu'][str(rows)] = bench_menu(rows, args.repeat, workdir)
+        for log_rows in args.log_rows:
+            report['db'][str(log_rows)] = bench_db(log_rows, args.repeat, workdir)
+        db.engine.dispose()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""
+Шар роботи з базою даних food_app.db.
+
+Один довгоживучий engine на процес: пул з'єднань із pre-ping, SQLite у
+режимі WAL (читачі не блокують запис), synchronous=NORMAL та busy_timeout,
+щоб паралельні сесії чекали на блокування, а не падали з
+"database is locked". Запис іде в явних транзакціях через engine.begin().
+"""
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
+
+from instrumentation import timed
+from migrations import migrate
+
+DB_URL = 'sqlite:///food_app.db'
+
+# Налаштування SQLite та пулу
+BUSY_TIMEOUT_MS = 5000
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+POOL_RECYCLE_S = 3600
+
+
+# --------------------------------------------------------------------------------
+# Engine
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """Виконується для кожного нового фізичного з'єднання в пулі."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_db_engine(url=DB_URL):
+    """Створює налаштований engine для SQLite-бази."""
+    new_engine = create_engine(
+        url,
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=POOL_RECYCLE_S,
+        connect_args={
+            # Streamlit виконує сесії в різних потоках, з'єднання ходять через пул
+            'check_same_thread': False,
+            'timeout': BUSY_TIMEOUT_MS / 1000,
+        },
+    )
+    event.listen(new_engine, 'connect', _set_sqlite_pragmas)
+    return new_engine
+
+
+engine = create_db_engine()
+
+
+def configure_engine(url, close=True):
+    """
+    Перемикає шар на іншу базу (наприклад, для бенчмарків чи CLI).
+    close=False — для дочірнього процесу після fork: успадковані з'єднання
+    належать батьківському процесу, тож їх лише відкидаємо, не закриваючи.
+    """
+    global engine
+    engine.dispose(close=close)
+    engine = create_db_engine(url)
+    return engine
+
+
+# --------------------------------------------------------------------------------
+# Функції для роботи з базою даних (користувачі, журнали, тощо)
+def create_tables():
+    """Створення таблиць, якщо їх ще немає."""
+    with engine.begin() as conn:
+        # Таблиця користувачів
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash BLOB NOT NULL
+        );
+        """))
+        # Таблиця журналу ваги та активності
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            weight REAL NOT NULL,
+            activity INTEGER NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        );
+        """))
+        # Таблиця для push-нагадувань (демо)
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            reminder_time TEXT NOT NULL,
+            message TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        );
+        """))
+    # Індекси та обмеження додаються версійованими міграціями
+    migrate(engine)
+
+
+@timed('db.get_user_id')
+def get_user_id(username):
+    """Повертає id користувача за username."""
+    with engine.connect() as conn:
+        result = conn.execute(
+            text("SELECT id FROM users WHERE username = :u"),
+            {"u": username}
+        ).fetchone()
+    return result[0] if result else None
+
+
+@timed('db.get_usernames')
+def get_usernames():
+    """Імена всіх користувачів у порядку реєстрації."""
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(
+            text("SELECT username FROM users ORDER BY id")
+        )]
+
+
+@timed('db.get_password_hash')
+def get_password_hash(username):
+    """Повертає збережений bcrypt-хеш пароля або None, якщо користувача немає."""
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT password_hash FROM users WHERE username=:u"),
+            {"u": username}
+        ).fetchone()
+    return row[0] if row else None
+
+
+@timed('db.insert_user')
+def insert_user(username, password_hash):
+    """Додає користувача з готовим хешем. Повертає False, якщо ім'я вже зайняте."""
+    # UNIQUE відсікає гонку двох одночасних реєстрацій
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO users (username, password_hash) VALUES (:u, :p)"),
+                {"u": username, "p": password_hash}
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+@timed('db.update_password_hash')
+def update_password_hash(username, password_hash):
+    """Замінює хеш пароля (наприклад, після зміни вартості bcrypt)."""
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE users SET password_hash=:p WHERE username=:u"),
+            {"u": username, "p": password_hash}
+        )
+
+
+# --------------------------------------------------------------------------------
+# Функції для журналу (логів)
+@timed('db.add_log')
+def add_log(user_id, date_value, weight_value, activity_value):
+    """
+    Додає запис про вагу й активність у таблицю logs.
+    Один запис на день: повторне додавання за ту саму дату оновлює його.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            text("""INSERT INTO logs (user_id, date, weight, activity)
+                    VALUES (:uid, :d, :w, :a)
+                    ON CONFLICT (user_id, date) DO UPDATE SET
+                        weight = excluded.weight,
+                        activity = excluded.activity"""),
+            {"uid": user_id, "d": date_value, "w": weight_value, "a": activity_value}
+        )
+
+
+@timed('db.add_logs_bulk')
+def add_logs_bulk(user_id, rows, batch_size=1000):
+    """
+    Масово додає записи журналу [(date, weight, activity), ...] в одній
+    транзакції, пачками через executemany. Дати, що вже є, оновлюються.
+    Повертає кількість оброблених записів.
+    """
+    statement = text("""INSERT INTO logs (user_id, date, weight, activity)
+                        VALUES (:uid, :d, :w, :a)
+                        ON CONFLICT (user_id, date) DO UPDATE SET
+                            weight = excluded.weight,
+                            activity = excluded.activity""")
+    total = 0
+    with engine.begin() as conn:
+        batch = []
+        for date_value, weight_value, activity_value in rows:
+            batch.append({"uid": user_id, "d": date_value, "w": weight_value, "a": activity_value})
+            if len(batch) >= batch_size:
+                conn.execute(statement, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            conn.execute(statement, batch)
+            total += len(batch)
+    return total
+
+
+@timed('db.get_logs')
+def get_logs(user_id):
+    """Отримує усі логи користувача з таблиці logs."""
+    with engine.connect() as conn:
+        data = conn.execute(
+            text("SELECT date, weight, activity FROM logs WHERE user_id=:uid ORDER BY date"),
+            {"uid": user_id}
+        ).fetchall()
+    # Перетворимо у DataFrame
+    if data:
+        df = pd.DataFrame(data, columns=['Дата', 'Вага', 'Активність'])
+        return df
+    else:
+        return pd.DataFrame(columns=['Дата', 'Вага', 'Активність'])
+
+
+# --------------------------------------------------------------------------------
+# Функції для членів домогосподарства
+@timed('db.get_household_members')
+def get_household_members(user_id):
+    """Члени домогосподарства: список (name, calorie_scale, calorie_target) за порядком."""
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(
+            text("""SELECT name, calorie_scale, calorie_target FROM household_members
+                    WHERE user_id=:uid ORDER BY position, id"""),
+            {"uid": user_id}
+        )]
+
+
+@timed('db.set_household_members')
+def set_household_members(user_id, members):
+    """Замінює склад домогосподарства [(name, calorie_scale, calorie_target), ...]."""
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM household_members WHERE user_id=:uid"),
+            {"uid": user_id}
+        )
+        if members:
+            conn.execute(
+                text("""INSERT INTO household_members
+                            (user_id, position, name, calorie_scale, calorie_target)
+                        VALUES (:uid, :pos, :name, :scale, :target)"""),
+                [{"uid": user_id, "pos": i, "name": name, "scale": scale, "target": target}
+                 for i, (name, scale, target) in enumerate(members)]
+            )
+
+
+# --------------------------------------------------------------------------------
+# Функції для push-нагадувань (демо-реалізація)
+
+# Слухачі змін нагадувань (наприклад, планувальник у reminder_scheduler.py).
+# Мають методи reminder_added(id, user_id, reminder_time, message) та
+# reminder_deleted(id); викликаються після коміту транзакції.
+_reminder_listeners = []
+
+
+def subscribe_reminders(listener):
+    _reminder_listeners.append(listener)
+
+
+def unsubscribe_reminders(listener):
+    if listener in _reminder_listeners:
+        _reminder_listeners.remove(listener)
+
+
+@timed('db.add_reminder')
+def add_reminder(user_id, reminder_time, message):
+    """Додає нагадування і повертає його id."""
+    with engine.begin() as conn:
+        result = conn.execute(
+            text("""INSERT INTO reminders (user_id, reminder_time, message)
+                    VALUES (:uid, :rt, :m)"""),
+            {"uid": user_id, "rt": reminder_time, "m": message}
+        )
+        reminder_id = result.lastrowid
+    for listener in list(_reminder_listeners):
+        listener.reminder_added(reminder_id, user_id, reminder_time, message)
+    return reminder_id
+
+
+@timed('db.get_reminders')
+def get_reminders(user_id):
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT id, reminder_time, message FROM reminders WHERE user_id=:uid"),
+            {"uid": user_id}
+        ).fetchall()
+    if rows:
+        df = pd.DataFrame(rows, columns=['ID', 'Час нагадування', 'Повідомлення'])
+        return df
+    else:
+        return pd.DataFrame(columns=['ID', 'Час нагадування', 'Повідомлення'])
+
+
+@timed('db.get_all_reminders')
+def get_all_reminders(after_id=0):
+    """Усі нагадування з id > after_id: список (id, user_id, reminder_time, message)."""
+    with engine.connect() as conn:
+        return conn.execute(
+            text("""SELECT id, user_id, reminder_time, message FROM reminders
+                    WHERE id > :after ORDER BY id"""),
+            {"after": after_id}
+        ).fetchall()
+
+
+def get_reminder_ids():
+    """Множина id усіх нагадувань (для звірки видалених)."""
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT id FROM reminders"))}
+
+
+@timed('db.delete_reminder')
+def delete_reminder(reminder_id):
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM reminders WHERE id=:rid"),
+            {"rid": reminder_id}
+        )
+    for listener in list(_reminder_listeners):
+        listener.reminder_deleted(reminder_id)
@@ -0,0 +1,120 @@
+"""
+Віконні та агреговані запити історії журналу для графіків.
+
+Замість передачі в браузер усіх записів за роки історії, журнал
+агрегується в SQL за обраний період і крок (день / тиждень / місяць):
+AVG(weight), SUM(activity). Поверх агрегатів рахується ковзне середнє
+ваги (лінія тренду). Режим 'auto' підбирає крок так, щоб точок було
+не більше MAX_CHART_POINTS, тож розмір графіка не залежить від довжини
+історії.
+"""
+import datetime
+
+import pandas as pd
+from sqlalchemy import text
+
+import db
+from instrumentation import timed
+
+# Ключ періоду в SQLite для кожного кроку (тиждень починається з понеділка)
+PERIOD_SQL = {
+    'day': "date",
+    'week': "date(date, '-6 days', 'weekday 1')",
+    'month': "strftime('%Y-%m-01', date)",
+}
+PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 30}
+# Вікно ковзного середнього для лінії тренду (у періодах)
+TREND_WINDOW = {'day': 7, 'week': 4, 'month': 3}
+
+MAX_CHART_POINTS = 120
+HISTORY_COLUMNS = ['Період', 'Вага', 'Тренд ваги', 'Активність', 'Записів']
+
+
+def _to_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value))
+
+
+@timed('db.get_log_bounds')
+def get_log_bounds(user_id):
+    """Перша й остання дата в журналі користувача (або (None, None))."""
+    with db.engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT MIN(date), MAX(date) FROM logs WHERE user_id=:uid"),
+            {"uid": user_id}
+        ).fetchone()
+    if row is None or row[0] is None:
+        return None, None
+    return _to_date(row[0]), _to_date(row[1])
+
+
+def choose_resolution(start, end, max_points=MAX_CHART_POINTS, minimum='day'):
+    """
+    Найдрібніший крок (не дрібніший за minimum), за якого в [start, end] не
+    більше max_points періодів; для дуже довгих діапазонів — 'month'.
+    """
+    span_days = (_to_date(end) - _to_date(start)).days + 1
+    steps = list(PERIOD_DAYS)
+    for resolution in steps[steps.index(minimum):-1]:
+        if span_days / PERIOD_DAYS[resolution] <= max_points:
+            return resolution
+    return 'month'
+
+
+def clamp_start(start, end, max_points=MAX_CHART_POINTS):
+    """Найраніший початок, за якого помісячних періодів не більше max_points."""
+    end = _to_date(end)
+    months_back = max_points - 1
+    year, month = divmod(end.year * 12 + end.month - 1 - months_back, 12)
+    return max(_to_date(start), datetime.date(year, month + 1, 1))
+
+
+@timed('db.get_log_history')
+def get_log_history(user_id, start=None, end=None, resolution='auto'):
+    """
+    Агрегована історія журналу за [start, end] з кроком resolution
+    ('day', 'week', 'month' або 'auto'). Повертає DataFrame зі стовпцями
+    HISTORY_COLUMNS, впорядкований за періодом. Точок завжди не більше
+    MAX_CHART_POINTS; фактичний крок — у df.attrs['resolution'].
+    """
+    if start is None or end is None:
+        first, last = get_log_bounds(user_id)
+        if first is None:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        start = start or first
+        end = end or last
+    start, end = _to_date(start), _to_date(end)
+    if resolution != 'auto' and resolution not in PERIOD_SQL:
+        raise ValueError(f"Невідомий крок: {resolution}")
+    # Явно обраний крок лише огрублюємо, якщо точок було б більше MAX_CHART_POINTS,
+    # а для найдовших діапазонів показуємо останні MAX_CHART_POINTS місяців
+    resolution = choose_resolution(start, end, minimum='day' if resolution == 'auto' else resolution)
+    if resolution == 'month':
+        start = clamp_start(start, end)
+
+    period = PERIOD_SQL[resolution]
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            text(f"""SELECT {period} AS period, AVG(weight), SUM(activity), COUNT(*)
+                     FROM logs
+                     WHERE user_id=:uid AND date BETWEEN :start AND :end
+                     GROUP BY period
+                     ORDER BY period"""),
+            {"uid": user_id, "start": start.isoformat(), "end": end.isoformat()}
+        ).fetchall()
+    if not rows:
+        df = pd.DataFrame(columns=HISTORY_COLUMNS)
+        df.attrs['resolution'] = resolution
+        return df
+
+    df = pd.DataFrame(rows, columns=['Період', 'Вага', 'Активність', 'Записів'])
+    df['Вага'] = df['Вага'].round(2)
+    df['Тренд ваги'] = (
+        df['Вага'].rolling(TREND_WINDOW[resolution], min_periods=1).mean().round(2)
+    )
+    df = df[HISTORY_COLUMNS]
+    df.attrs['resolution'] = resolution
+    return df
@@ -0,0 +1,108 @@
+"""
+Домогосподарство з N членів.
+
+Кожен член має масштаб калорій відносно базового профілю меню (стовпець
+'Калорії (Павло)') або денну ціль калорій, яка перераховується в масштаб
+через середню денну калорійність меню. Калорії всіх членів — це одна
+матрична операція (рядки меню × члени), а кількості інгредієнтів у
+списку покупок масштабуються тим самим вектором масштабів.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ingredients import SHOP_COLUMNS
+from instrumentation import timed
+from menu_model import CAL_MAN_COL, MEAL_COL, RECIPE_COL, WOMAN_CALORIES_RATIO
+
+Member = namedtuple('Member', ['name', 'calorie_scale', 'calorie_target'])
+
+# Склад за замовчуванням повторює початкове меню на двох
+DEFAULT_MEMBERS = [
+    Member('Павло', 1.0, None),
+    Member('Наталя', WOMAN_CALORIES_RATIO, None),
+]
+
+
+class Household:
+    """Члени домогосподарства і їхні масштаби калорій відносно базового профілю."""
+
+    def __init__(self, members, reference_daily_calories):
+        self.members = [Member(*m) for m in members] or list(DEFAULT_MEMBERS)
+        # Імена стають назвами стовпців, тож робимо їх унікальними
+        self.names = []
+        for m in self.members:
+            name = str(m.name)
+            while name in self.names:
+                name += "'"
+            self.names.append(name)
+        self.scales = np.array([
+            self._resolve_scale(m, reference_daily_calories) for m in self.members
+        ], dtype=float)
+        self.targets = np.array([
+            np.nan if m.calorie_target is None or pd.isna(m.calorie_target) else float(m.calorie_target)
+            for m in self.members
+        ])
+
+    @staticmethod
+    def _resolve_scale(member, reference_daily_calories):
+        """Ціль калорій (якщо задана) має пріоритет над масштабом."""
+        target = member.calorie_target
+        if target is not None and not pd.isna(target) and reference_daily_calories > 0:
+            return float(target) / reference_daily_calories
+        scale = member.calorie_scale
+        return 1.0 if scale is None or pd.isna(scale) else float(scale)
+
+    def base_targets(self, default_target):
+        """
+        Денна ціль кожного члена, перерахована на базовий профіль (ціль / масштаб):
+        член отримує ту саму страву у своєму масштабі, тож його ціль досягається,
+        коли базова калорійність дорівнює цьому значенню. Для членів без власної
+        цілі — default_target.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            own = self.targets / self.scales
+        return np.where(np.isfinite(own) & (own > 0), own, float(default_target))
+
+    @property
+    def portions(self):
+        """Сумарна кількість базових порцій на один прийом їжі."""
+        return float(self.scales.sum())
+
+    @timed('household.calorie_matrix')
+    def calorie_matrix(self, rows):
+        """Калорії для кожного рядка меню й кожного члена (рядки × члени)."""
+        matrix = np.outer(rows[CAL_MAN_COL].to_numpy(dtype=float), self.scales)
+        return pd.DataFrame(
+            np.rint(matrix).astype(int),
+            index=rows[MEAL_COL].to_numpy(),
+            columns=self.names,
+        )
+
+    @timed('household.shopping_list')
+    def shopping_list(self, ingredients, rows):
+        """
+        Список покупок на rows для всього домогосподарства: кількості з
+        рецепту (базова порція) × масштаб кожного члена, плюс разом.
+        """
+        # Рядок може повторюватись (напр., страва двічі за тиждень у плані)
+        repeats = rows.index.value_counts()
+        base = ingredients[
+            (ingredients['source'] == RECIPE_COL) & ingredients['row'].isin(repeats.index)
+        ]
+        quantities = base['quantity'].to_numpy(dtype=float) * base['row'].map(repeats).to_numpy()
+        per_member = quantities[:, None] * self.scales[None, :]
+        table = pd.DataFrame(per_member, columns=self.names)
+        table['product'] = base['product'].to_numpy()
+        table['unit'] = base['unit'].to_numpy()
+        totals = table.groupby(['product', 'unit'])[self.names].sum()
+
+        result = pd.DataFrame({
+            'Продукт': totals.index.get_level_values('product').str.capitalize(),
+            'Кількість': np.rint(totals.to_numpy().sum(axis=1)).astype(int),
+            'Од.': totals.index.get_level_values('unit'),
+        }, columns=SHOP_COLUMNS)
+        for name in self.names:
+            result[name] = np.rint(totals[name].to_numpy()).astype(int)
+        return result
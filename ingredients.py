@@ -0,0 +1,71 @@
+"""
+Векторне вилучення інгредієнтів із меню.
+
+Один попередньо скомпільований патерн проганяється через str.extractall
+по цілих стовпцях, одиниці зводяться до г / мл / шт. Список покупок
+будується з цієї таблиці в household.py одним groupby.
+"""
+import re
+
+import pandas as pd
+
+from instrumentation import timed
+
+# --------------------------------------------------------------------------------
+# Патерн "<Назва> <кількість> <одиниця>", наприклад "Молоко 200 мл", "Яйця 2 шт".
+# Довші одиниці стоять першими, щоб "гр"/"кг" не обрізались до "г", а одиниця
+# не може бути початком слова ("2 гречки" -> без одиниці).
+INGREDIENT_PATTERN = re.compile(
+    r'(?P<name>[А-Яа-яЇїІіЄєҐґA-Za-z0-9]+)\s(?P<qty>\d+)\s?'
+    r'(?P<unit>шт|кг|kg|гр|г|мл|л)?(?![А-Яа-яЇїІіЄєҐґA-Za-z0-9])'
+)
+
+# Одиниця з файлу -> (канонічна одиниця, множник)
+UNITS = {
+    'г': ('г', 1),
+    'гр': ('г', 1),
+    'кг': ('г', 1000),
+    'kg': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'шт': ('шт', 1),
+    '': ('шт', 1),  # умовно, якщо одиницю не знайдено
+}
+
+INGREDIENT_COLUMNS = [
+    'Страва (рецепт, калорії, техкарта)',
+    'Порція для чоловіка',
+    'Порція для дружини',
+]
+
+SHOP_COLUMNS = ['Продукт', 'Кількість', 'Од.']
+
+
+# --------------------------------------------------------------------------------
+@timed('menu.extract_ingredients')
+def extract_ingredients(menu_df, columns=INGREDIENT_COLUMNS):
+    """
+    Повертає охайну таблицю інгредієнтів меню:
+    row (індекс рядка меню), source (стовпець), product, quantity, unit.
+    Кількості вже переведені в канонічні одиниці (г, мл, шт).
+    """
+    frames = []
+    for column in columns:
+        found = menu_df[column].astype(str).str.extractall(INGREDIENT_PATTERN)
+        found['source'] = column
+        frames.append(found)
+    found = pd.concat(frames)
+
+    units = found['unit'].fillna('').str.lower()
+    canonical = units.map({unit: name for unit, (name, _) in UNITS.items()})
+    factor = units.map({unit: mult for unit, (_, mult) in UNITS.items()})
+
+    table = pd.DataFrame({
+        'row': found.index.get_level_values(0),
+        'source': found['source'].to_numpy(),
+        'product': found['name'].str.lower().to_numpy(),
+        'quantity': (found['qty'].astype(int) * factor).to_numpy(),
+        'unit': canonical.to_numpy(),
+    })
+    return table.sort_values('row', kind='stable').reset_index(drop=True)
+
@@ -0,0 +1,177 @@
+"""
+Інструментування гарячих шляхів.
+
+Таймінг-спани (контекстний менеджер span() і декоратор timed()), лічильник
+SQL-запитів (подія SQLAlchemy на всіх engine) і частота влучань у кеші.
+Дані пишуться у статистику поточного rerun (ContextVar — у кожної сесії
+Streamlit свій потік) і в накопичувальні лічильники процесу, які можна
+віддати текстом у форматі Prometheus. Streamlit тут не імпортується:
+панель у сайдбарі малює app.py.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('perf')
+
+# Писати підсумок кожного rerun у лог одним JSON-рядком
+PERF_LOG = os.environ.get('FOOD_APP_PERF_LOG') == '1'
+
+_current = contextvars.ContextVar('food_app_rerun', default=None)
+
+# Накопичувальні лічильники процесу
+_lock = threading.Lock()
+_span_totals = {}    # name -> [count, total_s, max_s]
+_cache_totals = {}   # name -> [hits, misses]
+_sql_total = 0
+_reruns_total = 0
+
+
+class RerunStats:
+    """Статистика одного rerun: спани, кількість SQL-запитів, влучання в кеші."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = None
+        self.spans = {}       # name -> [count, total_ms]
+        self.sql_queries = 0
+        self.cache = {}       # name -> [hits, misses]
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total_ms, 3) if self.total_ms is not None else None,
+            'sql_queries': self.sql_queries,
+            'spans': {name: {'count': c, 'total_ms': round(ms, 3)}
+                      for name, (c, ms) in self.spans.items()},
+            'cache': {name: {'hits': h, 'misses': m}
+                      for name, (h, m) in self.cache.items()},
+        }
+
+
+# --------------------------------------------------------------------------------
+# Межі rerun
+def start_rerun():
+    stats = RerunStats()
+    _current.set(stats)
+    return stats
+
+
+def finish_rerun():
+    """Закриває поточний rerun і повертає його статистику (або None)."""
+    global _reruns_total
+    stats = _current.get()
+    if stats is None:
+        return None
+    _current.set(None)
+    stats.total_ms = (time.perf_counter() - stats.started) * 1000
+    with _lock:
+        _reruns_total += 1
+    if PERF_LOG:
+        logger.info(json.dumps(stats.as_dict(), ensure_ascii=False))
+    return stats
+
+
+def current_rerun():
+    return _current.get()
+
+
+# --------------------------------------------------------------------------------
+# Запис подій
+def _record_span(name, seconds):
+    with _lock:
+        totals = _span_totals.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] = max(totals[2], seconds)
+    stats = _current.get()
+    if stats is not None:
+        span_stats = stats.spans.setdefault(name, [0, 0.0])
+        span_stats[0] += 1
+        span_stats[1] += seconds * 1000
+
+
+@contextmanager
+def span(name):
+    """Міряє час блоку коду під іменем name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_span(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Декоратор: кожен виклик функції — спан name."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache(name, hit):
+    """Фіксує влучання (hit=True) або промах у кеш name."""
+    index = 0 if hit else 1
+    with _lock:
+        _cache_totals.setdefault(name, [0, 0])[index] += 1
+    stats = _current.get()
+    if stats is not None:
+        stats.cache.setdefault(name, [0, 0])[index] += 1
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    global _sql_total
+    with _lock:
+        _sql_total += 1
+    stats = _current.get()
+    if stats is not None:
+        stats.sql_queries += 1
+
+
+# --------------------------------------------------------------------------------
+# Експорт
+def snapshot():
+    """Копія накопичувальних лічильників процесу."""
+    with _lock:
+        return {
+            'reruns': _reruns_total,
+            'sql_queries': _sql_total,
+            'spans': {name: {'count': c, 'total_s': total, 'max_s': peak}
+                      for name, (c, total, peak) in _span_totals.items()},
+            'cache': {name: {'hits': h, 'misses': m}
+                      for name, (h, m) in _cache_totals.items()},
+        }
+
+
+def prometheus_text():
+    """Накопичувальні лічильники у текстовому форматі Prometheus."""
+    data = snapshot()
+    lines = [
+        '# TYPE food_app_reruns_total counter',
+        f"food_app_reruns_total {data['reruns']}",
+        '# TYPE food_app_sql_queries_total counter',
+        f"food_app_sql_queries_total {data['sql_queries']}",
+        '# TYPE food_app_span_seconds summary',
+    ]
+    for name, s in sorted(data['spans'].items()):
+        lines.append(f'food_app_span_seconds_count{{span="{name}"}} {s["count"]}')
+        lines.append(f'food_app_span_seconds_sum{{span="{name}"}} {s["total_s"]:.6f}')
+    lines.append('# TYPE food_app_span_seconds_max gauge')
+    for name, s in sorted(data['spans'].items()):
+        lines.append(f'food_app_span_seconds_max{{span="{name}"}} {s["max_s"]:.6f}')
+    lines.append('# TYPE food_app_cache_requests_total counter')
+    for name, c in sorted(data['cache'].items()):
+        lines.append(f'food_app_cache_requests_total{{cache="{name}",result="hit"}} {c["hits"]}')
+        lines.append(f'food_app_cache_requests_total{{cache="{name}",result="miss"}} {c["misses"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,143 @@
+"""
+Масовий імпорт і потоковий експорт журналу ваги та активності.
+
+Імпорт читає CSV/XLSX (наприклад, вивантаження з фітнес-трекера),
+нормалізує стовпці й дати і записує все однією транзакцією через
+executemany (db.add_logs_bulk). Експорт читає журнал із бази частинами
+через pd.read_sql(..., chunksize=...) і одразу пише їх у файл, не
+збираючи всю історію в пам'яті.
+"""
+import io
+
+import pandas as pd
+from sqlalchemy import text
+
+import db
+
+LOG_COLUMNS = ['Дата', 'Вага', 'Активність']
+EXPORT_CHUNKSIZE = 5000
+
+# Назви стовпців, які розуміємо при імпорті (без урахування регістру)
+COLUMN_ALIASES = {
+    'дата': 'Дата', 'date': 'Дата', 'day': 'Дата',
+    'вага': 'Вага', 'вага (кг)': 'Вага', 'weight': 'Вага', 'weight_kg': 'Вага',
+    'активність': 'Активність', 'активність (хв/день)': 'Активність',
+    'activity': 'Активність', 'activity_min': 'Активність', 'active_minutes': 'Активність',
+}
+
+
+def _is_excel(name):
+    return str(name).lower().endswith(('.xlsx', '.xls'))
+
+
+# --------------------------------------------------------------------------------
+# Імпорт
+def read_logs_file(source, filename=None):
+    """Зчитує CSV або XLSX (шлях чи файловий об'єкт, напр. зі st.file_uploader)."""
+    name = filename or getattr(source, 'name', None) or str(source)
+    if _is_excel(name):
+        return pd.read_excel(source)
+    return pd.read_csv(source, encoding='utf-8-sig')
+
+
+def normalize_logs(raw_df):
+    """
+    Приводить таблицю до стовпців Дата/Вага/Активність.
+    Дати — ISO-рядки 'YYYY-MM-DD' (як їх зберігає add_log); рядки без
+    коректної дати чи ваги відкидаються. Повертає (DataFrame, к-сть відкинутих).
+    """
+    df = raw_df.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip().lower(), c))
+    missing = [c for c in ('Дата', 'Вага') if c not in df.columns]
+    if missing:
+        raise ValueError(f"У файлі немає стовпців: {', '.join(missing)}")
+    if 'Активність' not in df.columns:
+        df['Активність'] = 0
+
+    # Спершу ISO-формат, потім звичний "дд.мм.рррр"
+    dates = pd.to_datetime(df['Дата'], format='ISO8601', errors='coerce')
+    dates = dates.fillna(pd.to_datetime(df['Дата'], format='%d.%m.%Y', errors='coerce'))
+    weights = pd.to_numeric(df['Вага'].astype(str).str.replace(',', '.'), errors='coerce')
+    activity = pd.to_numeric(df['Активність'], errors='coerce').fillna(0).round()
+
+    valid = dates.notna() & weights.notna() & (weights > 0)
+    result = pd.DataFrame({
+        'Дата': dates[valid].dt.strftime('%Y-%m-%d'),
+        'Вага': weights[valid].astype(float),
+        'Активність': activity[valid].astype(int),
+    })
+    # Одна дата — один запис (як у таблиці logs), перемагає останній
+    result = result.drop_duplicates('Дата', keep='last')
+    return result, int((~valid).sum())
+
+
+def import_logs(user_id, source, filename=None):
+    """Імпортує журнал з файлу. Повертає (к-сть імпортованих, к-сть відкинутих)."""
+    logs_df, skipped = normalize_logs(read_logs_file(source, filename))
+    imported = db.add_logs_bulk(user_id, logs_df.itertuples(index=False, name=None))
+    return imported, skipped
+
+
+# --------------------------------------------------------------------------------
+# Експорт
+def _iter_log_chunks(user_id, chunksize):
+    with db.engine.connect() as conn:
+        chunks = pd.read_sql(
+            text("SELECT date, weight, activity FROM logs WHERE user_id=:uid ORDER BY date"),
+            conn,
+            params={"uid": user_id},
+            chunksize=chunksize,
+        )
+        for chunk in chunks:
+            chunk.columns = LOG_COLUMNS
+            yield chunk
+
+
+def export_logs(user_id, out, fmt='csv', chunksize=EXPORT_CHUNKSIZE):
+    """
+    Записує журнал користувача у out (шлях або бінарний файловий об'єкт)
+    у форматі 'csv' чи 'xlsx', частинами по chunksize рядків.
+    Повертає кількість записаних рядків.
+    """
+    total = 0
+    if fmt == 'xlsx':
+        from openpyxl import Workbook
+
+        # write_only — openpyxl теж не тримає всю таблицю в пам'яті
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Журнал')
+        sheet.append(LOG_COLUMNS)
+        for chunk in _iter_log_chunks(user_id, chunksize):
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append(list(row))
+            total += len(chunk)
+        workbook.save(out)
+        return total
+
+    if fmt != 'csv':
+        raise ValueError(f"Невідомий формат експорту: {fmt}")
+    if isinstance(out, (str, bytes)) or hasattr(out, '__fspath__'):
+        handle = open(out, 'w', encoding='utf-8-sig', newline='')
+    else:
+        handle = io.TextIOWrapper(out, encoding='utf-8-sig', newline='')
+    try:
+        header = True
+        for chunk in _iter_log_chunks(user_id, chunksize):
+            chunk.to_csv(handle, header=header, index=False)
+            header = False
+            total += len(chunk)
+        if header:
+            pd.DataFrame(columns=LOG_COLUMNS).to_csv(handle, index=False)
+    finally:
+        if isinstance(handle, io.TextIOWrapper) and handle.buffer is out:
+            handle.flush()
+            handle.detach()  # не закриваємо чужий файловий об'єкт
+        else:
+            handle.close()
+    return total
+
+
+def export_logs_bytes(user_id, fmt='csv'):
+    """Експорт у пам'ять (для st.download_button)."""
+    buffer = io.BytesIO()
+    export_logs(user_id, buffer, fmt)
+    return buffer.getvalue()
@@ -0,0 +1,183 @@
+"""
+Дисковий кеш скомпільованого меню.
+
+Розібране й нормалізоване меню разом із калоріями та таблицею інгредієнтів
+зберігається у бінарному колонковому форматі (Parquet через pyarrow, або
+pickle, якщо pyarrow не встановлено). Ключ кешу — mtime та SHA-256 вмісту
+файлу-джерела (CSV або XLSX): поки файл не змінився, холодний старт читає
+готові таблиці замість повторного розбору, а змінене меню підхоплюється
+без перезапуску.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+
+from instrumentation import record_cache, timed
+from menu_model import MenuModel, build_menu_model
+
+try:
+    import pyarrow  # noqa: F401  (потрібен pandas для Parquet)
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+logger = logging.getLogger('menu_cache')
+
+CACHE_DIR = '.menu_cache'
+CACHE_VERSION = 3  # змінюємо, коли змінюється логіка компіляції меню
+
+
+# --------------------------------------------------------------------------------
+# Читання джерела
+def read_menu_source(path):
+    """Зчитує сире меню з CSV або XLSX (перший аркуш)."""
+    if path.lower().endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(path)
+    else:
+        df = pd.read_csv(path, encoding='utf-8-sig')
+    return df.dropna()
+
+
+def source_mtime(path):
+    """mtime файлу-джерела в наносекундах (дешева частина ключа кешу)."""
+    return os.stat(path).st_mtime_ns
+
+
+def file_hash(path):
+    """SHA-256 вмісту файлу."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --------------------------------------------------------------------------------
+# Запис / читання таблиць
+def _table_path(cache_dir, stem, digest, name):
+    ext = 'parquet' if CACHE_FORMAT == 'parquet' else 'pkl'
+    return os.path.join(cache_dir, f"{stem}.{digest[:16]}.{name}.{ext}")
+
+
+def _atomic_write(path, write):
+    """
+    write(tmp_path) пише у власний тимчасовий файл поруч із path, потім
+    os.replace атомарно підміняє path: паралельні репліки не читають півфайлу
+    і не перехоплюють одна в одної тимчасові файли.
+    """
+    # Префікс '.' — щоб _remove_stale не прибрав чужий незавершений запис
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_table(df, path):
+    if CACHE_FORMAT == 'parquet':
+        _atomic_write(path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+    else:
+        _atomic_write(path, df.to_pickle)
+
+
+def _read_table(path):
+    if CACHE_FORMAT == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    _atomic_write(meta_path, write)
+
+
+def _remove_stale(cache_dir, stem, digest):
+    """Прибирає таблиці попередніх версій того самого файлу."""
+    prefix = f"{stem}."
+    keep = f"{stem}.{digest[:16]}."
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and not name.startswith(keep) and not name.endswith('.json'):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+# --------------------------------------------------------------------------------
+@timed('menu.load_compiled_menu')
+def load_compiled_menu(path, cache_dir=CACHE_DIR):
+    """
+    Повертає MenuModel для файлу меню, використовуючи дисковий кеш.
+
+    Спершу порівнюємо mtime і розмір (без читання файлу); якщо вони
+    змінились — рахуємо хеш вмісту, і лише коли змінився й він, заново
+    розбираємо джерело та перезаписуємо кеш.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.basename(path)
+    meta_path = os.path.join(cache_dir, f"{stem}.json")
+    stat = os.stat(path)
+
+    current_digest = None
+    meta = _read_meta(meta_path)
+    if meta and meta.get('version') == CACHE_VERSION and meta.get('format') == CACHE_FORMAT:
+        digest = meta['sha256']
+        unchanged = meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size
+        if not unchanged:
+            current_digest = file_hash(path)
+        if not unchanged and current_digest == digest:
+            # Файл "торкнули", але вміст той самий — лише оновлюємо mtime
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_meta(meta_path, meta)
+            unchanged = True
+        if unchanged:
+            try:
+                model = MenuModel(
+                    _read_table(_table_path(cache_dir, stem, digest, 'menu')),
+                    _read_table(_table_path(cache_dir, stem, digest, 'ingredients')),
+                )
+            except (OSError, ValueError):
+                pass  # пошкоджений або неповний кеш — компілюємо заново
+            else:
+                record_cache('menu_disk', True)
+                return model
+
+    record_cache('menu_disk', False)
+    digest = current_digest or file_hash(path)
+    model = build_menu_model(read_menu_source(path))
+    try:
+        _write_table(model.df, _table_path(cache_dir, stem, digest, 'menu'))
+        _write_table(model.ingredients, _table_path(cache_dir, stem, digest, 'ingredients'))
+        _write_meta(meta_path, {
+            'version': CACHE_VERSION,
+            'format': CACHE_FORMAT,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+        })
+        _remove_stale(cache_dir, stem, digest)
+    except OSError:
+        # Кеш — лише оптимізація: якщо запис не вдався (напр., гонка з іншою
+        # реплікою), модель уже побудована, а кеш оновить наступний промах
+        logger.warning("Не вдалося записати кеш меню для %s", path, exc_info=True)
+    return model
@@ -0,0 +1,135 @@
+"""
+Попередньо скомпільована модель меню.
+
+Будується один раз у load_menu(): нормалізує ключі днів, заздалегідь рахує
+калорії базового профілю порцій і таблицю інгредієнтів, а також тримає
+індекс "день -> зріз рядків", тож вибір дня — це пошук у словнику, а не
+сканування всього стовпця.
+"""
+import numpy as np
+
+from ingredients import extract_ingredients
+from instrumentation import timed
+
+# --------------------------------------------------------------------------------
+# Назви стовпців у файлі меню
+DAY_COL = 'Дні'
+MEAL_COL = 'Час прийому їжі'
+RECIPE_COL = 'Страва (рецепт, калорії, техкарта)'
+MAN_PORTION_COL = 'Порція для чоловіка'
+WOMAN_PORTION_COL = 'Порція для дружини'
+
+# Похідний стовпець із калоріями базового профілю
+CAL_MAN_COL = 'Калорії (Павло)'
+
+CALORIES_PATTERN = r'(\d+)\s?ккал'
+# Рядок рецепту з калоріями базового профілю: "- Чоловік: 450 ккал",
+# "Жменя горіхів (30 г, 180 ккал) – чоловік"
+BASE_PROFILE_PATTERN = r'(?i)чоловік'
+# Можна припустити, що Наталя споживає ~80% калорій від Павла
+WOMAN_CALORIES_RATIO = 0.8
+
+
+# --------------------------------------------------------------------------------
+# Допоміжні функції
+@timed('menu.compute_calories')
+def compute_calories(series):
+    """
+    Калорії базової порції ('Порція для чоловіка') для кожного рядка стовпця.
+
+    Рецепт зазвичай містить калорії обох порцій ("Чоловік: 450 ккал /
+    Дружина: 350 ккал"), тож беремо лише рядки рецепту з міткою чоловіка.
+    Якщо таких міток немає, підсумовуємо всі вказівки "N ккал" (наприклад,
+    "Омлет 350 ккал" -> 350), а якщо немає й їх — 0.
+    """
+    lines = series.astype(str).str.split('\n').explode()
+    base_lines = lines[lines.str.contains(BASE_PROFILE_PATTERN)]
+    base = _sum_calories(base_lines)
+    totals = _sum_calories(lines)
+    labelled = series.index.isin(base.index)
+    return base.reindex(series.index).where(labelled, totals.reindex(series.index)).fillna(0).astype(int)
+
+
+def _sum_calories(lines):
+    """Сума "N ккал" за індексом рядка меню (лише рядки, де вони є)."""
+    matches = lines.str.extractall(CALORIES_PATTERN)[0]
+    return matches.astype(int).groupby(level=0).sum()
+
+
+def normalize_day(value):
+    """Ключ дня для пошуку: без зайвих пробілів і регістру."""
+    return str(value).strip().lower()
+
+
+# --------------------------------------------------------------------------------
+# Модель меню
+class MenuModel:
+    """
+    Меню з калоріями та індексом за днями.
+
+    Рядки впорядковані за днями (у порядку першої появи у файлі), тому
+    кожен день — це суцільний зріз, а кілька днів поспіль — один зріз.
+    """
+
+    def __init__(self, df, ingredients):
+        """Приймає вже скомпільовані таблиці (див. build_menu_model)."""
+        self.df = df
+        self.ingredients = ingredients
+
+        # Рядки вже впорядковані за днями, тож коди днів не спадають
+        keys = df[DAY_COL].map(normalize_day)
+        first_rows = ~keys.duplicated()
+        self.day_keys = keys[first_rows].tolist()
+        self.days = df.loc[first_rows, DAY_COL].tolist()
+        self.day_positions = {key: i for i, key in enumerate(self.day_keys)}
+
+        codes = keys.map(self.day_positions).to_numpy()
+        positions = np.arange(len(self.day_keys))
+        starts = np.searchsorted(codes, positions, side='left')
+        stops = np.searchsorted(codes, positions, side='right')
+        self.day_index = {
+            key: slice(int(start), int(stop))
+            for key, start, stop in zip(self.day_keys, starts, stops)
+        }
+
+        # Середня денна калорійність базового профілю — для перерахунку
+        # цільових калорій членів домогосподарства в масштаб (household.py)
+        day_totals = np.add.reduceat(df[CAL_MAN_COL].to_numpy(), starts) if len(starts) else starts
+        self.reference_daily_calories = float(day_totals.mean()) if len(day_totals) else 0.0
+
+    def day_position(self, day):
+        """Порядковий номер дня у меню або None."""
+        return self.day_positions.get(normalize_day(day))
+
+    def day(self, day):
+        """Рядки меню для одного дня (порожній DataFrame, якщо дня немає)."""
+        rows = self.day_index.get(normalize_day(day))
+        if rows is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[rows]
+
+    def rows_for_days(self, day, days_count):
+        """Рядки меню для days_count днів поспіль, починаючи з обраного."""
+        position = self.day_position(day)
+        if position is None:
+            return self.day(day)
+        last = min(position + days_count, len(self.day_keys)) - 1
+        start = self.day_index[self.day_keys[position]].start
+        stop = self.day_index[self.day_keys[last]].stop
+        return self.df.iloc[start:stop]
+
+
+@timed('menu.build_menu_model')
+def build_menu_model(df):
+    """
+    Компілює сирий DataFrame меню у MenuModel: впорядковує рядки за днями
+    (у порядку першої появи у файлі), рахує калорії та інгредієнти.
+    """
+    df = df.reset_index(drop=True)
+    keys = df[DAY_COL].map(normalize_day)
+    first_seen = {key: i for i, key in enumerate(keys[~keys.duplicated()])}
+    order = np.argsort(keys.map(first_seen).to_numpy(), kind='stable')
+    df = df.iloc[order].reset_index(drop=True)
+
+    df[CAL_MAN_COL] = compute_calories(df[RECIPE_COL])
+    return MenuModel(df, extract_ingredients(df))
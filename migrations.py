@@ -0,0 +1,96 @@
+"""
+Версійовані міграції схеми food_app.db.
+
+Поточна версія схеми зберігається в PRAGMA user_version. Кожна міграція —
+номер, опис і список SQL-інструкцій; migrate() застосовує ті, що новіші за
+збережену версію, кожну у власній транзакції (BEGIN IMMEDIATE), тож дві
+репліки, що стартують одночасно, не застосують одну міграцію двічі.
+"""
+
+# (версія, опис, інструкції) — лише додаємо нові в кінець, старі не змінюємо
+MIGRATIONS = [
+    (
+        1,
+        "logs: унікальний запис на (user_id, date) + складений індекс",
+        [
+            # Прибираємо дублікати за день, залишаючи останній доданий запис
+            """
+            DELETE FROM logs
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM logs GROUP BY user_id, date
+            )
+            """,
+            # Індекс водночас обслуговує WHERE user_id=... ORDER BY date
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_logs_user_date ON logs (user_id, date)",
+        ],
+    ),
+    (
+        2,
+        "reminders: індекс за користувачем і часом нагадування",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_reminders_user_time ON reminders (user_id, reminder_time)",
+        ],
+    ),
+    (
+        3,
+        "household_members: члени домогосподарства з масштабом або ціллю калорій",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS household_members (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                name TEXT NOT NULL,
+                calorie_scale REAL NOT NULL DEFAULT 1.0,
+                calorie_target INTEGER,
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_household_user ON household_members (user_id, position)",
+        ],
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(engine):
+    """Повертає поточну версію схеми (PRAGMA user_version)."""
+    raw = engine.raw_connection()
+    try:
+        return raw.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        raw.close()
+
+
+def migrate(engine):
+    """Застосовує всі незастосовані міграції. Повертає список застосованих версій."""
+    # Швидкий шлях без блокування на запис: схема вже актуальна
+    if get_schema_version(engine) >= SCHEMA_VERSION:
+        return []
+    applied = []
+    raw = engine.raw_connection()
+    # Керуємо транзакціями вручну, щоб DDL і user_version були атомарними
+    driver_conn = raw.driver_connection
+    isolation_level = driver_conn.isolation_level
+    driver_conn.isolation_level = None
+    try:
+        for version, _description, statements in MIGRATIONS:
+            driver_conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = driver_conn.execute("PRAGMA user_version").fetchone()[0]
+                if version <= current:
+                    driver_conn.execute("ROLLBACK")
+                    continue
+                for statement in statements:
+                    driver_conn.execute(statement)
+                driver_conn.execute(f"PRAGMA user_version = {int(version)}")
+                driver_conn.execute("COMMIT")
+            except Exception:
+                driver_conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+    finally:
+        driver_conn.isolation_level = isolation_level
+        raw.close()
+    return applied
@@ -0,0 +1,185 @@
+"""
+Автоматичний планувальник меню на тиждень.
+
+Для кожного дня й кожного прийому їжі (сніданок, обід, ...) обирається
+страва з пулу розібраного меню так, щоб денна калорійність кожного члена
+домогосподарства була близькою до його цілі, а тиждень використовував
+якомога менше різних продуктів — тобто список покупок був коротшим.
+Члени отримують ту саму страву у своєму масштабі, тож ціль члена
+перераховується на базовий профіль (ціль / масштаб, див.
+Household.base_targets), а відхилення рахується для кожного члена.
+
+Пошук: жадібний старт + локальний пошук на заздалегідь порахованих
+векторах (калорії страв, булева матриця "страва × продукт"). Оцінка
+заміни однієї страви на будь-якого кандидата зі слоту — це один
+матрично-векторний добуток, а весь пошук обмежений бюджетом часу.
+"""
+import random
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from menu_model import CAL_MAN_COL, MEAL_COL, RECIPE_COL
+
+DEFAULT_TIME_BUDGET_S = 0.5
+# Скільки відсотків відхилення калорій за день "коштує" один зайвий продукт
+DEFAULT_REUSE_WEIGHT = 1.0
+DEFAULT_MAX_REPEATS = 2
+
+Plan = namedtuple('Plan', ['rows', 'daily_calories', 'products', 'cost', 'iterations', 'elapsed_s',
+                           'relaxed_slots'])
+
+
+def meal_slot(label):
+    """'08:00 (Сніданок)' -> 'Сніданок'; без дужок — мітка як є."""
+    label = str(label)
+    if '(' in label and label.endswith(')'):
+        return label[label.rindex('(') + 1:-1].strip()
+    return label.strip()
+
+
+def dish_name(recipe):
+    """Назва страви — перший рядок рецепту до двокрапки."""
+    return str(recipe).strip().split('\n', 1)[0].split(':', 1)[0].strip()
+
+
+class MenuPlanner:
+    """Пул страв меню, розкладений по слотах, з векторами калорій і продуктів."""
+
+    def __init__(self, model):
+        df = model.df
+        self.df = df
+        self.reference_daily_calories = model.reference_daily_calories
+        self.calories = df[CAL_MAN_COL].to_numpy(dtype=float)
+
+        # Булева матриця "рядок меню × продукт" за інгредієнтами рецепту
+        recipe = model.ingredients[model.ingredients['source'] == RECIPE_COL]
+        codes, self.product_names = pd.factorize(recipe['product'])
+        # float32 — щоб добутки йшли через BLAS
+        self.products = np.zeros((len(df), len(self.product_names)), dtype=np.float32)
+        self.products[recipe['row'].to_numpy(), codes] = 1
+
+        # Слоти в порядку появи в меню і їхні пули страв; рядки без калорій
+        # (не розібрані чи службові) у план не беремо
+        slots = df[MEAL_COL].map(meal_slot).where(self.calories > 0)
+        self.slots = list(dict.fromkeys(slots.dropna()))
+        self.pools = [np.flatnonzero((slots == slot).to_numpy()) for slot in self.slots]
+        # Частка слоту в денній калорійності — для жадібного старту
+        slot_means = np.array([self.calories[pool].mean() for pool in self.pools])
+        self.slot_shares = slot_means / slot_means.sum() if len(slot_means) else slot_means
+
+    # ----------------------------------------------------------------------------
+    def _day_cost(self, day_calories, targets):
+        """
+        Середнє по членах відхилення (у %) денної калорійності від цілі;
+        targets — цілі членів у базовому профілі, day_calories — число або масив.
+        """
+        day_calories = np.asarray(day_calories, dtype=float)[..., None]
+        return (np.abs(day_calories - targets) / targets * 100).mean(axis=-1)
+
+    @timed('planner.plan')
+    def plan(self, days=7, target_calories=None, reuse_weight=DEFAULT_REUSE_WEIGHT,
+             max_repeats=DEFAULT_MAX_REPEATS, time_budget_s=DEFAULT_TIME_BUDGET_S, seed=0):
+        """
+        Складає план на days днів. target_calories — денна ціль базового
+        профілю або список цілей членів у базовому профілі
+        (Household.base_targets); за замовчуванням — середня денна
+        калорійність меню. Якщо страв у слоті замало для days днів,
+        max_repeats для нього послаблюється до мінімально можливого
+        (такі слоти — у plan.relaxed_slots).
+        Повертає Plan; plan.rows — рядки меню з колонками 'День' і 'Слот'.
+        Якщо в меню немає страв із калоріями, кидає ValueError.
+        """
+        if not self.slots:
+            raise ValueError("У меню немає страв із розпізнаними калоріями")
+        started = time.perf_counter()
+        deadline = started + time_budget_s
+        rnd = random.Random(seed)
+        default_target = self.reference_daily_calories or 1.0
+        targets = np.atleast_1d(np.asarray(
+            default_target if target_calories is None else target_calories, dtype=float))
+        targets = np.where(targets > 0, targets, default_target)
+        # Ціль для жадібного старту — одна на всіх
+        target_calories = float(targets.mean())
+        n_slots = len(self.slots)
+
+        # Ліміт повторів кожної страви; для слотів, де страв менше, ніж
+        # days / max_repeats, інакше всі кандидати були б заборонені
+        repeat_cap = np.full(len(self.df), max_repeats, dtype=np.int32)
+        relaxed_slots = []
+        for slot, pool in zip(self.slots, self.pools):
+            needed = -(-days // len(pool))
+            if needed > max_repeats:
+                repeat_cap[pool] = needed
+                relaxed_slots.append(slot)
+
+        repeats = np.zeros(len(self.df), dtype=np.int32)
+        counts = np.zeros(self.products.shape[1], dtype=np.float32)
+        choice = np.zeros((days, n_slots), dtype=np.int64)
+        day_calories = np.zeros(days)
+
+        # Жадібний старт: у кожен слот — страва, найближча до своєї частки цілі
+        # з найменшою кількістю нових продуктів
+        for d in range(days):
+            for s, pool in enumerate(self.pools):
+                new_products = self.products[pool] @ (counts == 0).astype(np.float32)
+                calorie_gap = np.abs(self.calories[pool] - target_calories * self.slot_shares[s])
+                score = calorie_gap / target_calories * 100 + reuse_weight * new_products
+                score = np.where(repeats[pool] < repeat_cap[pool], score, np.inf)
+                row = pool[int(np.argmin(score))]
+                choice[d, s] = row
+                repeats[row] += 1
+                counts += self.products[row]
+                day_calories[d] += self.calories[row]
+
+        # Локальний пошук: найкраща заміна страви в випадковій клітинці (день, слот)
+        iterations = 0
+        stale = 0
+        cells = days * n_slots
+        while time.perf_counter() < deadline and stale < cells:
+            iterations += 1
+            d, s = rnd.randrange(days), rnd.randrange(n_slots)
+            pool = self.pools[s]
+            current = choice[d, s]
+
+            counts_without = counts - self.products[current]
+            base_cal = day_calories[d] - self.calories[current]
+            # Зміна кількості різних продуктів для кожного кандидата одним добутком
+            missing = (counts_without == 0).astype(np.float32)
+            products_delta = self.products[pool] @ missing - self.products[current] @ missing
+            cal_delta = (
+                self._day_cost(base_cal + self.calories[pool], targets)
+                - self._day_cost(day_calories[d], targets)
+            )
+            delta = cal_delta + reuse_weight * products_delta
+            allowed = (repeats[pool] < repeat_cap[pool]) | (pool == current)
+            delta = np.where(allowed, delta, np.inf)
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                row = pool[best]
+                repeats[current] -= 1
+                repeats[row] += 1
+                counts = counts_without + self.products[row]
+                day_calories[d] = base_cal + self.calories[row]
+                choice[d, s] = row
+                stale = 0
+            else:
+                stale += 1
+
+        rows = self.df.iloc[choice.ravel()].copy()
+        rows.insert(0, 'Слот', np.tile(self.slots, days))
+        rows.insert(0, 'День', np.repeat(np.arange(1, days + 1), n_slots))
+        products = int((counts > 0).sum())
+        cost = float(self._day_cost(day_calories, targets).sum() + reuse_weight * products)
+        return Plan(
+            rows=rows,
+            daily_calories=day_calories,
+            products=products,
+            cost=cost,
+            iterations=iterations,
+            elapsed_s=time.perf_counter() - started,
+            relaxed_slots=relaxed_slots,
+        )
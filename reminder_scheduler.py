@@ -0,0 +1,239 @@
+"""
+Планувальник нагадувань.
+
+Усі нагадування тримаються в купі (heapq), впорядкованій за часом
+наступного спрацювання, а потік спить до найближчого з них, а не опитує
+таблицю. Додавання — O(log n), видалення — ліниве (запис у купі просто
+ігнорується, коли до нього доходить черга). Нагадування щоденні:
+після відправки запис повертається в купу на наступну добу.
+
+Зміни, зроблені через db.add_reminder / db.delete_reminder у тому ж
+процесі, надходять одразу (планувальник підписується на них). Окремий
+процес-демон додатково раз на resync_interval звіряється з базою, щоб
+підхопити зміни з інших процесів:
+
+    python reminder_scheduler.py --sink reminders.log
+"""
+import argparse
+import datetime
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import db
+
+logger = logging.getLogger('reminders')
+
+# Як часто звірятися з базою, с (зміни, зроблені іншими процесами)
+DEFAULT_RESYNC_S = 300
+
+Reminder = namedtuple('Reminder', ['id', 'user_id', 'reminder_time', 'message', 'fire_at'])
+
+
+# --------------------------------------------------------------------------------
+# Нотифікатори: будь-який callable, що приймає Reminder
+class LogNotifier:
+    """Пише спрацювання в лог (для демо та локальної перевірки)."""
+
+    def __call__(self, reminder):
+        logger.info("Нагадування #%s для користувача %s: %s",
+                    reminder.id, reminder.user_id, reminder.message)
+
+
+class FileNotifier:
+    """Дописує спрацювання у файл, по одному JSON-рядку."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, reminder):
+        line = json.dumps({
+            'id': reminder.id,
+            'user_id': reminder.user_id,
+            'reminder_time': reminder.reminder_time,
+            'message': reminder.message,
+            'fired_at': datetime.datetime.fromtimestamp(reminder.fire_at).isoformat(),
+        }, ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+# --------------------------------------------------------------------------------
+def next_fire_at(reminder_time, now=None):
+    """Найближчий момент (timestamp), коли настає щоденний час 'HH:MM[:SS]'."""
+    now = now or time.time()
+    at = datetime.time.fromisoformat(str(reminder_time))
+    today = datetime.datetime.fromtimestamp(now).date()
+    fire_at = datetime.datetime.combine(today, at).timestamp()
+    if fire_at <= now:
+        fire_at = datetime.datetime.combine(today + datetime.timedelta(days=1), at).timestamp()
+    return fire_at
+
+
+class ReminderScheduler:
+    """Фоновий потік, що відправляє нагадування у notifier у їхній час."""
+
+    def __init__(self, notifier=None, resync_interval=None):
+        self.notifier = notifier or LogNotifier()
+        self.resync_interval = resync_interval
+        self._heap = []              # (fire_at, seq, reminder_id)
+        self._reminders = {}         # id -> актуальний Reminder
+        self._seq = itertools.count()
+        self._max_id = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def __len__(self):
+        return len(self._reminders)
+
+    # ----------------------------------------------------------------------------
+    # Зміни розкладу
+    def _schedule(self, reminder_id, user_id, reminder_time, message, now=None):
+        try:
+            fire_at = next_fire_at(reminder_time, now)
+        except ValueError:
+            logger.warning("Нагадування #%s має некоректний час %r", reminder_id, reminder_time)
+            return
+        self._reminders[reminder_id] = Reminder(reminder_id, user_id, reminder_time, message, fire_at)
+        heapq.heappush(self._heap, (fire_at, next(self._seq), reminder_id))
+        self._max_id = max(self._max_id, reminder_id)
+
+    def load(self):
+        """Повне завантаження з бази (викликається при старті)."""
+        rows = db.get_all_reminders()
+        now = time.time()
+        with self._cond:
+            self._heap.clear()
+            self._reminders.clear()
+            for row in rows:
+                self._schedule(*row, now=now)
+            self._cond.notify()
+
+    def resync(self):
+        """Звіряється з базою: додає нові нагадування, прибирає видалені."""
+        with self._cond:
+            known_max = self._max_id
+        new_rows = db.get_all_reminders(after_id=known_max)
+        # id ростуть монотонно (AUTOINCREMENT): усе, що додали після цього
+        # запиту, має id > seen_max. Такі нагадування могли вже прийти через
+        # reminder_added, але в знімку id їх ще немає — їх не чіпаємо,
+        # інакше вони зникли б назавжди (наступні resync беруть лише id > _max_id)
+        seen_max = max([known_max] + [row[0] for row in new_rows])
+        existing = db.get_reminder_ids()
+        with self._cond:
+            for row in new_rows:
+                self._schedule(*row)
+            for reminder_id in set(self._reminders) - existing:
+                if reminder_id <= seen_max:
+                    del self._reminders[reminder_id]
+            self._compact()
+            self._cond.notify()
+
+    def reminder_added(self, reminder_id, user_id, reminder_time, message):
+        with self._cond:
+            self._schedule(reminder_id, user_id, reminder_time, message)
+            self._cond.notify()
+
+    def reminder_deleted(self, reminder_id):
+        with self._cond:
+            # Запис у купі залишається і буде пропущений при спрацюванні
+            self._reminders.pop(reminder_id, None)
+            self._compact()
+            self._cond.notify()
+
+    def _compact(self):
+        """Перебудовує купу, коли застарілих записів стає більше, ніж живих."""
+        if len(self._heap) > 2 * len(self._reminders) + 64:
+            self._heap = [(r.fire_at, next(self._seq), r.id) for r in self._reminders.values()]
+            heapq.heapify(self._heap)
+
+    # ----------------------------------------------------------------------------
+    # Основний цикл
+    def _pop_due(self, now):
+        """Забирає з купи всі нагадування, час яких настав."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, reminder_id = heapq.heappop(self._heap)
+            reminder = self._reminders.get(reminder_id)
+            if reminder is None or reminder.fire_at != fire_at:
+                continue  # видалене або вже перенесене нагадування
+            due.append(reminder)
+            # Щоденне нагадування — плануємо на наступну добу (пропущені
+            # за час простою спрацювання не повторюємо)
+            self._schedule(reminder.id, reminder.user_id, reminder.reminder_time,
+                           reminder.message, now=now)
+        return due
+
+    def _run(self):
+        last_resync = time.monotonic()
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.time()
+                due = self._pop_due(now)
+                if not due:
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    if self.resync_interval is not None:
+                        timeout = min(timeout or self.resync_interval, self.resync_interval)
+                    self._cond.wait(timeout)
+            for reminder in due:
+                try:
+                    self.notifier(reminder)
+                except Exception:
+                    logger.exception("Не вдалося відправити нагадування #%s", reminder.id)
+            if (self.resync_interval is not None
+                    and time.monotonic() - last_resync >= self.resync_interval):
+                last_resync = time.monotonic()
+                try:
+                    self.resync()
+                except Exception:
+                    logger.exception("Не вдалося синхронізувати нагадування з базою")
+
+    def start(self):
+        """Завантажує нагадування, підписується на зміни і запускає потік."""
+        self.load()
+        db.subscribe_reminders(self)
+        self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        db.unsubscribe_reminders(self)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+# --------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Демон щоденних нагадувань food_app.db")
+    parser.add_argument('--db', default=db.DB_URL, help="URL бази (за замовчуванням %(default)s)")
+    parser.add_argument('--sink', help="файл для спрацювань (JSON-рядки); без нього — лише лог")
+    parser.add_argument('--resync', type=float, default=DEFAULT_RESYNC_S,
+                        help="як часто звірятися з базою, с (зміни з інших процесів)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    if args.db != db.DB_URL:
+        db.configure_engine(args.db)
+    notifier = FileNotifier(args.sink) if args.sink else LogNotifier()
+    scheduler = ReminderScheduler(notifier, resync_interval=args.resync).start()
+    logger.info("Заплановано нагадувань: %d", len(scheduler))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == '__main__':
+    main()
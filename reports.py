@@ -0,0 +1,339 @@
+"""
+Пакетні звіти без Streamlit: списки покупок і калорійність.
+
+Для кожного завдання (користувач × меню × діапазон дат) будується звіт:
+калорії за датами для кожного члена домогосподарства, сумарні калорії та
+список покупок на весь діапазон. Дата зіставляється з днем меню за
+датою у файлі (ISO або дд.мм.рррр), а якщо таких немає — за днем тижня.
+Розрахунок той самий, що й у застосунку (menu_model, household), тож
+нічні звіти й сторінка в браузері дають однакові числа.
+
+Багато завдань розподіляються між процесами (ProcessPoolExecutor); кожен
+процес завантажує скомпільоване меню з дискового кешу один раз.
+
+    python reports.py --all-users --start 2026-10-19 --days 7 --out-dir reports
+    python reports.py --user pavlo --range 2026-10-19:2026-10-25 --range 2026-10-26:2026-11-01
+    python reports.py --serve --port 8765
+"""
+import argparse
+import datetime
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import db
+from household import Household
+from instrumentation import prometheus_text, timed
+from menu_cache import load_compiled_menu, source_mtime
+
+logger = logging.getLogger('reports')
+
+DEFAULT_MENU = 'Харчування.csv'
+DEFAULT_DAYS = 7
+DATE_COL = 'Дата'
+WEEKDAYS = ['Понеділок', 'Вівторок', 'Середа', 'Четвер', "П'ятниця", 'Субота', 'Неділя']
+
+ReportJob = namedtuple('ReportJob', ['username', 'menu_path', 'start', 'end'])
+
+
+# --------------------------------------------------------------------------------
+# Меню
+@functools.lru_cache(maxsize=8)
+def _load_menu(path, mtime_ns):
+    """mtime_ns — частина ключа, щоб змінене меню підхоплювалось без перезапуску."""
+    return load_compiled_menu(path)
+
+
+def load_menu(path=DEFAULT_MENU):
+    """MenuModel з дискового кешу; у межах процесу — один раз на версію файлу."""
+    return _load_menu(path, source_mtime(path))
+
+
+def menu_day(model, date):
+    """Ключ дня меню для дати (дата у файлі або день тижня) чи None."""
+    for key in (date.isoformat(), date.strftime('%d.%m.%Y'), WEEKDAYS[date.weekday()]):
+        if model.day_position(key) is not None:
+            return key
+    return None
+
+
+def date_range(start, end):
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+# --------------------------------------------------------------------------------
+# Звіти
+@timed('reports.build_report')
+def build_report(model, members, start, end):
+    """
+    Звіт для домогосподарства members за [start, end]: калорії за датами,
+    сума калорій на члена і список покупок. Повертає JSON-сумісний словник.
+    """
+    household = Household(members, model.reference_daily_calories)
+    parts, missing = [], []
+    for date in date_range(start, end):
+        key = menu_day(model, date)
+        if key is None:
+            missing.append(date.isoformat())
+            continue
+        parts.append(model.day(key).assign(**{DATE_COL: date.isoformat()}))
+    report = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'members': household.names,
+        'portions': round(household.portions, 3),
+        'missing_dates': missing,
+        'daily_calories': [],
+        'total_calories': dict.fromkeys(household.names, 0),
+        'shopping_list': [],
+    }
+    if not parts:
+        return report
+
+    # Один день тижня в діапазоні кілька разів — рядки повторюються, і список
+    # покупок враховує кожне повторення
+    rows = pd.concat(parts)
+    calories = household.calorie_matrix(rows)
+    calories.index = rows[DATE_COL].to_numpy()
+    daily = calories.groupby(level=0, sort=False).sum()
+    report['daily_calories'] = daily.rename_axis(DATE_COL).reset_index().to_dict('records')
+    report['total_calories'] = daily.sum().to_dict()
+    report['shopping_list'] = household.shopping_list(model.ingredients, rows).to_dict('records')
+    return report
+
+
+def user_report(job):
+    """Звіт для одного ReportJob (виконується і в процесах пулу)."""
+    result = {'user': job.username, 'menu': os.path.basename(job.menu_path)}
+    user_id = db.get_user_id(job.username)
+    if user_id is None:
+        result['error'] = "Користувача не знайдено"
+        return result
+    result['user_id'] = user_id
+    try:
+        model = load_menu(job.menu_path)
+    except (OSError, ValueError) as e:
+        result['error'] = f"Не вдалося завантажити меню: {e}"
+        return result
+    result.update(build_report(model, db.get_household_members(user_id), job.start, job.end))
+    return result
+
+
+def make_jobs(usernames, menu_paths, ranges):
+    """Усі комбінації користувач × меню × діапазон [(start, end), ...]."""
+    return [
+        ReportJob(username, menu_path, start, end)
+        for username, menu_path, (start, end) in itertools.product(usernames, menu_paths, ranges)
+    ]
+
+
+def _init_worker(db_url):
+    # Нове з'єднання в кожному процесі: успадковані після fork лише відкидаємо,
+    # закривати їх має батьківський процес
+    db.configure_engine(db_url, close=False)
+    # Схема актуальна — лише одне читання PRAGMA user_version
+    db.create_tables()
+
+
+def run_batch(jobs, workers=None, db_url=None):
+    """
+    Виконує завдання й повертає звіти в тому ж порядку. workers=1 (або одне
+    завдання) — у поточному процесі, інакше — у пулі процесів.
+    """
+    db_url = db_url or db.DB_URL
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        return [user_report(job) for job in jobs]
+    # Кожне меню компілюємо один раз тут: після fork процеси отримують
+    # готову модель, а інакше — читають уже записаний дисковий кеш
+    for menu_path in dict.fromkeys(job.menu_path for job in jobs):
+        try:
+            load_menu(menu_path)
+        except (OSError, ValueError):
+            pass  # помилку отримає кожен звіт із цим меню
+    # Завдання з однаковим меню поруч — процес рідше перемикає моделі в кеші
+    order = sorted(range(len(jobs)), key=lambda i: jobs[i].menu_path)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)), initializer=_init_worker, initargs=(db_url,)
+    ) as executor:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        results = executor.map(user_report, [jobs[i] for i in order], chunksize=chunksize)
+        reports = [None] * len(jobs)
+        for i, report in zip(order, results):
+            reports[i] = report
+    return reports
+
+
+def _slug(value, limit=40):
+    """Безпечна частина імені файлу: лише літери, цифри, '-' і '_'."""
+    return re.sub(r'[^\w-]+', '_', str(value)).strip('_')[:limit] or '_'
+
+
+def report_filename(report):
+    """
+    Ім'я файлу звіту. Ім'я користувача може бути будь-яким рядком, тож воно
+    йде в ім'я лише як slug, а унікальність дає user_id (або хеш імені для
+    невідомих користувачів).
+    """
+    user_key = report.get('user_id') or hashlib.sha256(report['user'].encode('utf-8')).hexdigest()[:12]
+    menu_stem = _slug(os.path.splitext(report['menu'])[0])
+    dates = f"{report.get('start', '')}_{report.get('end', '')}"
+    return f"{user_key}_{_slug(report['user'])}_{menu_stem}_{dates}.json"
+
+
+def write_reports(reports, out_dir):
+    """Записує кожен звіт окремим JSON-файлом в out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    root = os.path.realpath(out_dir)
+    for report in reports:
+        path = os.path.realpath(os.path.join(root, report_filename(report)))
+        if os.path.dirname(path) != root:
+            raise ValueError(f"Шлях звіту поза {out_dir}: {path}")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+# --------------------------------------------------------------------------------
+# Локальний HTTP-endpoint
+def make_handler(menu_paths):
+    """
+    GET /report?user=...&start=...&end=...[&menu=...] — звіт у JSON;
+    GET /metrics — лічильники у форматі Prometheus. Меню обирається лише
+    з menu_paths (за іменем файлу), довільні шляхи не приймаються.
+    """
+    menus = {os.path.basename(path): path for path in menu_paths}
+    default_menu = menu_paths[0]
+
+    class ReportHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type='application/json; charset=utf-8'):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_json(self, status, payload):
+            self._send(status, json.dumps(payload, ensure_ascii=False))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/metrics':
+                self._send(200, prometheus_text(), 'text/plain; version=0.0.4')
+                return
+            if url.path != '/report':
+                self._send_json(404, {'error': "Невідомий шлях"})
+                return
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if 'user' not in query:
+                self._send_json(400, {'error': "Потрібен параметр user"})
+                return
+            try:
+                start = datetime.date.fromisoformat(query.get('start', datetime.date.today().isoformat()))
+                end = (datetime.date.fromisoformat(query['end']) if 'end' in query
+                       else start + datetime.timedelta(days=DEFAULT_DAYS - 1))
+            except ValueError:
+                self._send_json(400, {'error': "Дати мають бути у форматі РРРР-ММ-ДД"})
+                return
+            menu_path = menus.get(query['menu']) if 'menu' in query else default_menu
+            if menu_path is None or end < start:
+                self._send_json(400, {'error': "Невідоме меню або порожній діапазон"})
+                return
+            report = user_report(ReportJob(query['user'], menu_path, start, end))
+            self._send_json(404 if 'error' in report else 200, report)
+
+        def log_message(self, format, *args):
+            logger.info("%s %s", self.address_string(), format % args)
+
+    return ReportHandler
+
+
+def serve(menu_paths, host='127.0.0.1', port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(menu_paths))
+    logger.info("Звіти на http://%s:%d/report", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# --------------------------------------------------------------------------------
+def _parse_range(value):
+    try:
+        start, end = value.split(':', 1)
+        start, end = datetime.date.fromisoformat(start), datetime.date.fromisoformat(end)
+    except ValueError:
+        raise argparse.ArgumentTypeError("діапазон має бути РРРР-ММ-ДД:РРРР-ММ-ДД")
+    if end < start:
+        raise argparse.ArgumentTypeError("кінець діапазону раніше за початок")
+    return start, end
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетні списки покупок і звіти калорійності")
+    parser.add_argument('--db', default=db.DB_URL, help="URL бази (за замовчуванням %(default)s)")
+    parser.add_argument('--menu', nargs='+', default=[DEFAULT_MENU],
+                        help="файли меню (CSV/XLSX)")
+    users = parser.add_mutually_exclusive_group()
+    users.add_argument('--user', nargs='+', help="імена користувачів")
+    users.add_argument('--all-users', action='store_true', help="усі користувачі бази")
+    parser.add_argument('--start', type=datetime.date.fromisoformat,
+                        help="перша дата (за замовчуванням сьогодні)")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="днів від --start")
+    parser.add_argument('--range', type=_parse_range, action='append', dest='ranges',
+                        help="діапазон РРРР-ММ-ДД:РРРР-ММ-ДД замість --start/--days; можна кілька разів")
+    parser.add_argument('--workers', type=int, help="процесів у пулі (за замовчуванням — усі ядра)")
+    parser.add_argument('--out-dir', help="тека для JSON-звітів; без неї — JSON-рядки в stdout")
+    parser.add_argument('--serve', action='store_true', help="запустити локальний HTTP-endpoint")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    if args.db != db.DB_URL:
+        db.configure_engine(args.db)
+    # База могла ще не пройти міграції (напр., застосунок не перезапускали
+    # після оновлення), а звіти читають household_members
+    db.create_tables()
+    if args.serve:
+        serve(args.menu, args.host, args.port)
+        return
+    if not args.user and not args.all_users:
+        parser.error("вкажіть --user, --all-users або --serve")
+
+    ranges = args.ranges
+    if not ranges:
+        start = args.start or datetime.date.today()
+        ranges = [(start, start + datetime.timedelta(days=max(args.days, 1) - 1))]
+    usernames = db.get_usernames() if args.all_users else args.user
+    jobs = make_jobs(usernames, args.menu, ranges)
+    reports = run_batch(jobs, args.workers, args.db)
+
+    failed = [r for r in reports if 'error' in r]
+    for report in failed:
+        logger.warning("%s / %s: %s", report['user'], report['menu'], report['error'])
+    if args.out_dir:
+        write_reports(reports, args.out_dir)
+        logger.info("Звітів записано: %d (з помилками: %d)", len(reports), len(failed))
+    else:
+        for report in reports:
+            print(json.dumps(report, ensure_ascii=False))
+    # Навіть одна помилка — ненульовий код, щоб нічний запуск її не приховав
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Контекст користувача на час сесії.
+
+Зберігається в st.session_state після входу: user_id знаходимо один раз,
+а журнал і нагадування кешуються, доки їх не змінять add_log,
+import_logs, add_reminder або delete_reminder цього ж контексту. Так
+звичайний rerun (будь-яка взаємодія з віджетом) не ходить у базу зовсім.
+"""
+import db
+import history
+import log_io
+from instrumentation import record_cache
+
+
+class UserContext:
+    """user_id та кеш даних користувача для однієї сесії."""
+
+    def __init__(self, username, user_id):
+        self.username = username
+        self.user_id = user_id
+        self._cache = {}
+
+    @classmethod
+    def for_user(cls, username):
+        """Створює контекст для username (один запит get_user_id) або None."""
+        user_id = db.get_user_id(username)
+        if user_id is None:
+            return None
+        return cls(username, user_id)
+
+    def _cached(self, key, loader, *args):
+        """key — (група, ...параметри); група використовується для інвалідації."""
+        hit = key in self._cache
+        record_cache('user_ctx', hit)
+        if not hit:
+            self._cache[key] = loader(self.user_id, *args)
+        return self._cache[key]
+
+    def invalidate(self, *groups):
+        """Скидає кеш для вказаних груп ('logs', 'reminders') або весь."""
+        if not groups:
+            self._cache.clear()
+        for key in [k for k in self._cache if k[0] in groups]:
+            del self._cache[key]
+
+    # ----------------------------------------------------------------------------
+    # Журнал ваги та активності
+    def log_bounds(self):
+        return self._cached(('logs', 'bounds'), history.get_log_bounds)
+
+    def log_history(self, start, end, resolution='auto'):
+        key = ('logs', 'history', start, end, resolution)
+        # Тримаємо лише останній запитаний період, інакше кожне положення
+        # вибору дат залишало б у сесії ще одну таблицю
+        for stale in [k for k in self._cache if k[:2] == key[:2] and k != key]:
+            del self._cache[stale]
+        return self._cached(key, history.get_log_history, start, end, resolution)
+
+    def add_log(self, date_value, weight_value, activity_value):
+        db.add_log(self.user_id, date_value, weight_value, activity_value)
+        self.invalidate('logs')
+
+    def import_logs(self, source, filename=None):
+        """Масовий імпорт з CSV/XLSX; повертає (імпортовано, відкинуто)."""
+        result = log_io.import_logs(self.user_id, source, filename)
+        self.invalidate('logs')
+        return result
+
+    # ----------------------------------------------------------------------------
+    # Домогосподарство
+    def household_members(self):
+        return self._cached(('household',), db.get_household_members)
+
+    def set_household_members(self, members):
+        db.set_household_members(self.user_id, members)
+        self.invalidate('household')
+
+    # ----------------------------------------------------------------------------
+    # Нагадування
+    def reminders(self):
+        return self._cached(('reminders',), db.get_reminders)
+
+    def add_reminder(self, reminder_time, message):
+        db.add_reminder(self.user_id, reminder_time, message)
+        self.invalidate('reminders')
+
+    def delete_reminder(self, reminder_id):
+        db.delete_reminder(reminder_id)
+        self.invalidate('reminders')
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Модулі застосунку лежать у корені репозиторію
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """Порожня food_app.db у тимчасовій теці замість робочої бази."""
+    previous_url = str(db.engine.url)
+    db.configure_engine(f"sqlite:///{tmp_path / 'food_app.db'}")
+    db.create_tables()
+    yield db.engine
+    db.configure_engine(previous_url)
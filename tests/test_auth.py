@@ -0,0 +1,61 @@
+import pytest
+
+import auth
+from auth import AttemptLimiter, AuthService, LoginThrottled
+
+
+def test_limiter_blocks_after_max_attempts():
+    limiter = AttemptLimiter(3, window_s=60)
+    for _ in range(3):
+        assert limiter.retry_after('pavlo') == 0
+        limiter.record('pavlo')
+    assert limiter.retry_after('pavlo') > 0
+    assert limiter.retry_after('natalia') == 0
+
+
+def test_limiter_window_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth.time, 'monotonic', lambda: now[0])
+    limiter = AttemptLimiter(2, window_s=10)
+    limiter.record('ip')
+    limiter.record('ip')
+    assert limiter.retry_after('ip') > 0
+    now[0] += 11
+    assert limiter.retry_after('ip') == 0
+
+
+def test_limiter_sweeps_keys_never_seen_again(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth.time, 'monotonic', lambda: now[0])
+    limiter = AttemptLimiter(5, window_s=10)
+    for i in range(500):
+        limiter.record(f'spray{i}')
+    assert len(limiter) == 500
+    now[0] += 11
+    limiter.record('next')
+    assert len(limiter) == 1
+
+
+def test_limiter_caps_tracked_keys():
+    limiter = AttemptLimiter(5, window_s=60, max_keys=100)
+    for i in range(1000):
+        limiter.record(f'10.0.{i // 256}.{i % 256}')
+    assert len(limiter) <= 100
+
+
+def test_login_throttled_after_failed_attempts(temp_db):
+    service = AuthService(rounds=4, workers=1)
+    assert service.create_user('pavlo', 'secret')
+    for _ in range(auth.MAX_ATTEMPTS_PER_USER):
+        assert not service.login('pavlo', 'wrong')
+    with pytest.raises(LoginThrottled):
+        service.login('pavlo', 'secret')
+
+
+def test_login_throttled_per_ip(temp_db):
+    service = AuthService(rounds=4, workers=1)
+    for i in range(auth.MAX_ATTEMPTS_PER_IP):
+        assert not service.login(f'nobody{i}', 'x', client_ip='10.0.0.1')
+    with pytest.raises(LoginThrottled):
+        service.login('someone', 'x', client_ip='10.0.0.1')
+    assert not service.login('someone', 'x', client_ip='10.0.0.2')
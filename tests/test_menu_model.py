@@ -0,0 +1,23 @@
+import pandas as pd
+
+from household import Household
+from menu_model import compute_calories
+
+
+def test_calories_use_base_portion_label():
+    recipes = pd.Series([
+        "Омлет:\n - Яйця 3 шт.\n Калорії:\n - Чоловік: 450 ккал\n - Дружина: 350 ккал",
+        "Йогурт:\n - Чоловік: 150 г йогурту (120 ккал)\n - Дружина: яблуко (~150 г, 80 ккал)",
+        "Жменя горіхів (30 г, 180 ккал) – чоловік,\n Йогурт (100 г) – дружина (120 ккал)",
+    ])
+    assert compute_calories(recipes).tolist() == [450, 120, 180]
+
+
+def test_calories_fall_back_to_sum_without_labels():
+    recipes = pd.Series(["Салат:\n Калорії: 120 ккал (однаково для обох)", "Омлет 350 ккал", "Без калорій"])
+    assert compute_calories(recipes).tolist() == [120, 350, 0]
+
+
+def test_member_target_scales_from_base_portion():
+    household = Household([('Павло', None, 2000)], reference_daily_calories=1600)
+    assert household.scales.tolist() == [1.25]
@@ -0,0 +1,51 @@
+from sqlalchemy import create_engine, text
+
+import db
+from migrations import SCHEMA_VERSION, get_schema_version, migrate
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,"
+    " password_hash BLOB NOT NULL)",
+    "CREATE TABLE logs (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,"
+    " date DATE NOT NULL, weight REAL NOT NULL, activity INTEGER NOT NULL)",
+    "CREATE TABLE reminders (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,"
+    " reminder_time TEXT NOT NULL, message TEXT)",
+]
+
+
+def _legacy_engine(tmp_path):
+    """База у форматі до міграцій: без індексів, з дублікатами за день."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO users (username, password_hash) VALUES ('pavlo', 'x')"))
+        conn.execute(text("""INSERT INTO logs (user_id, date, weight, activity) VALUES
+                             (1, '2026-10-01', 80, 10), (1, '2026-10-01', 79, 20),
+                             (1, '2026-10-02', 78, 30)"""))
+    return engine
+
+
+def test_fresh_database_is_at_latest_version(temp_db):
+    assert get_schema_version(temp_db) == SCHEMA_VERSION
+    assert db.get_household_members(1) == []
+
+
+def test_migrate_dedupes_legacy_logs_keeping_latest(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    assert get_schema_version(engine) == 0
+    assert migrate(engine) == list(range(1, SCHEMA_VERSION + 1))
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT date, weight FROM logs ORDER BY date")).fetchall()
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master"))}
+    assert [tuple(row) for row in rows] == [('2026-10-01', 79), ('2026-10-02', 78)]
+    assert {'ux_logs_user_date', 'ix_reminders_user_time', 'household_members'} <= tables
+    engine.dispose()
+
+
+def test_migrate_is_idempotent(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    migrate(engine)
+    assert migrate(engine) == []
+    assert get_schema_version(engine) == SCHEMA_VERSION
+    engine.dispose()
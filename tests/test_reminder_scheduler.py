@@ -0,0 +1,75 @@
+import datetime
+
+import db
+from reminder_scheduler import ReminderScheduler, next_fire_at
+
+
+def _user(name='pavlo'):
+    db.insert_user(name, b'hash')
+    return db.get_user_id(name)
+
+
+def _scheduler():
+    scheduler = ReminderScheduler(notifier=lambda reminder: None)
+    scheduler.load()
+    db.subscribe_reminders(scheduler)
+    return scheduler
+
+
+def test_next_fire_at_rolls_over_to_tomorrow():
+    now = datetime.datetime(2026, 10, 18, 9, 0).timestamp()
+    assert next_fire_at('08:00', now) == datetime.datetime(2026, 10, 19, 8, 0).timestamp()
+    assert next_fire_at('10:30', now) == datetime.datetime(2026, 10, 18, 10, 30).timestamp()
+
+
+def test_resync_picks_up_changes_from_other_processes(temp_db):
+    user_id = _user()
+    scheduler = _scheduler()
+    try:
+        first = db.add_reminder(user_id, '08:00:00', 'Сніданок')
+        # Інший процес: пишемо в базу напряму, без слухачів
+        db.unsubscribe_reminders(scheduler)
+        second = db.add_reminder(user_id, '13:00:00', 'Обід')
+        db.delete_reminder(first)
+        db.subscribe_reminders(scheduler)
+        scheduler.resync()
+        assert set(scheduler._reminders) == {second}
+    finally:
+        db.unsubscribe_reminders(scheduler)
+
+
+def test_resync_keeps_reminder_added_during_resync(temp_db, monkeypatch):
+    user_id = _user()
+    scheduler = _scheduler()
+    try:
+        db.add_reminder(user_id, '08:00:00', 'Сніданок')
+        get_reminder_ids = db.get_reminder_ids
+
+        def snapshot_then_add():
+            ids = get_reminder_ids()
+            # Інша сесія комітить нагадування між знімком id і блокуванням
+            db.add_reminder(user_id, '13:00:00', 'Обід')
+            return ids
+
+        monkeypatch.setattr(db, 'get_reminder_ids', snapshot_then_add)
+        scheduler.resync()
+        monkeypatch.setattr(db, 'get_reminder_ids', get_reminder_ids)
+        scheduler.resync()
+        assert set(scheduler._reminders) == db.get_reminder_ids()
+        assert len(scheduler._reminders) == 2
+    finally:
+        db.unsubscribe_reminders(scheduler)
+
+
+def test_due_reminders_are_rescheduled_for_next_day(temp_db):
+    user_id = _user()
+    scheduler = _scheduler()
+    try:
+        reminder_id = db.add_reminder(user_id, '08:00:00', 'Сніданок')
+        fire_at = scheduler._reminders[reminder_id].fire_at
+        due = scheduler._pop_due(fire_at)
+        assert [r.id for r in due] == [reminder_id]
+        assert scheduler._reminders[reminder_id].fire_at > fire_at
+        assert scheduler._pop_due(fire_at) == []
+    finally:
+        db.unsubscribe_reminders(scheduler)